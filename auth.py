@@ -1,13 +1,20 @@
 # auth.py
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import os
-import subprocess
 from dotenv import load_dotenv
 import json
+import orjson
 from datetime import datetime
+import asyncio
+import atexit
+import contextlib
 import time
+import hashlib
 import logging
+import tempfile
 import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
 
 # Configure logging
 logging.basicConfig(
@@ -19,117 +26,576 @@ logger = logging.getLogger('10cric_auth')
 # Load environment variables from .env file
 load_dotenv()
 
-def authenticate(headless=False):
+# Account credentials, read once at import; authenticate() also takes them as arguments
+CRIC10_USERNAME = os.getenv("CRIC10_USERNAME")
+CRIC10_PASSWORD = os.getenv("CRIC10_PASSWORD")
+
+SPORTS_PAGE_URL = "https://www.10crics.com/cricket/indian-premier-league"
+
+# Write screenshots and partial token dumps when something goes wrong
+DEBUG_ARTIFACTS = os.getenv("CRIC10_DEBUG") == "1"
+
+# Delay (ms) before every browser action; only useful when watching a headed run
+SLOW_MO = int(os.getenv("CRIC10_SLOW_MO", "0"))
+
+BROWSER_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--dns-prefetch-disable",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-features=Translate,TranslateUI,BlinkGenPropertyTrees,BackForwardCache"
+]
+
+# Saved browser session (cookies + localStorage) reused to skip the login form
+STORAGE_STATE_FILE = ".storage_state.json"
+SESSION_LIFETIME = int(os.getenv("CRIC10_SESSION_LIFETIME", str(12 * 3600)))
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36"
+
+# Requests the login flow never needs; aborting them cuts most of the page weight
+BLOCKED_RESOURCE_TYPES = frozenset({
+    "image", "font", "media", "stylesheet", "beacon", "imageset", "texttrack", "object", "csp_report"
+})
+BLOCKED_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "onesignal.com",
+    "intercom.io"
+)
+
+# Elements that only render for a logged-in player
+SUCCESS_INDICATORS = [
+    '.WalletButton_trigger__xmZ98',
+    'button[data-uat="header-multiwallet-trigger"]',
+    '.balance',
+    '.user-balance',
+    '.logged-in',
+    '.deposit-button',
+    'button:has-text("Deposit")'
+]
+
+# Pre-joined selector lists (Playwright matches any entry of a comma list)
+SUCCESS_SELECTOR = ", ".join(SUCCESS_INDICATORS)
+EMAIL_SELECTOR = 'input[type="email"], input[placeholder="Email"]'
+PASSWORD_SELECTOR = 'input[type="password"], input[placeholder="********"]'
+
+# Candidate login submit buttons, most specific first
+SUBMIT_SELECTORS = [
+    'button[data-testid="login button"]',
+    'button[data-uat="login-submit"]',
+    '.SignInWithLoginType_loginBtn__2DAce',
+    'form button',
+    'button:has-text("Log in")'
+]
+
+# DOM helpers injected into every page of an auth context, so each probe
+# below is a one-line call into an already compiled function.
+# Playwright-only selectors (e.g. :has-text) are not valid CSS and are skipped.
+AUTH_HELPERS_JS = """
+window.__auth = {
+    // Resolves once the sportsbook has written the tokens we extract
+    tokensReady() {
+        return !!(localStorage.getItem('sportsbook:token') || localStorage.getItem('sportsbookToken')) &&
+            !!(localStorage.getItem('sportsbookPlayerId') || localStorage.getItem('apc_user_id'));
+    },
+
+    // True as soon as a rendered text node shows the balance currency symbol;
+    // walks text nodes and stops at the first hit instead of laying out innerText
+    hasRupee() {
+        if (!document.body) {
+            return false;
+        }
+        const skip = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE']);
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+        let node;
+        while ((node = walker.nextNode())) {
+            if (node.nodeValue.includes('₹') && !skip.has(node.parentNode.nodeName)) {
+                return true;
+            }
+        }
+        return false;
+    },
+
+    // localStorage, every success indicator and the balance currency symbol in one round-trip
+    snapshot(selectors) {
+        return {
+            localStorage: Object.entries(localStorage),
+            indicators: selectors.map(selector => {
+                try {
+                    return !!document.querySelector(selector);
+                } catch (e) {
+                    return null;
+                }
+            }),
+            rupee: this.hasRupee()
+        };
+    },
+
+    // Resolves with the first selector to appear, watching DOM mutations
+    // instead of polling, or with null once the timeout passes
+    waitForIndicator(selectors, timeout) {
+        const find = () => {
+            for (const selector of selectors) {
+                try {
+                    if (document.querySelector(selector)) {
+                        return selector;
+                    }
+                } catch (e) {}
+            }
+            return null;
+        };
+        return new Promise(resolve => {
+            const found = find();
+            if (found) {
+                resolve(found);
+                return;
+            }
+            const observer = new MutationObserver(() => {
+                const match = find();
+                if (match) {
+                    observer.disconnect();
+                    clearTimeout(timer);
+                    resolve(match);
+                }
+            });
+            const timer = setTimeout(() => {
+                observer.disconnect();
+                resolve(null);
+            }, timeout);
+            observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+        });
+    },
+
+    // Clicks the first selector that matches and returns it (null if none did)
+    clickFirst(selectors) {
+        for (const selector of selectors) {
+            let element = null;
+            try {
+                element = document.querySelector(selector);
+            } catch (e) {
+                continue;
+            }
+            if (element) {
+                element.click();
+                return selector;
+            }
+        }
+        return null;
+    },
+
+    // Drops modal backdrops that swallow clicks and presses the "Log in" button
+    removeBackdropAndLogin() {
+        document.querySelectorAll('.MuiBackdrop-root').forEach(b => b.remove());
+        Array.from(document.querySelectorAll('button')).find(
+            button => button.textContent.includes('Log in')
+        )?.click();
+    }
+};
+"""
+
+TOKENS_READY_JS = "() => window.__auth.tokensReady()"
+SNAPSHOT_JS = "(selectors) => window.__auth.snapshot(selectors)"
+WAIT_FOR_INDICATOR_JS = "([selectors, timeout]) => window.__auth.waitForIndicator(selectors, timeout)"
+CLICK_FIRST_JS = "(selectors) => window.__auth.clickFirst(selectors)"
+REMOVE_BACKDROP_JS = "() => window.__auth.removeBackdropAndLogin()"
+
+class BrowserPool:
+    """
+    Keeps warm Chromium instances around so each login only pays for a new context.
+    """
+    def __init__(self, size=1, headless=True, max_idle_time=300, cleanup_interval=60):
+        """
+        Initialize the browser pool.
+        
+        Args:
+            size: Maximum number of browsers kept alive
+            headless: Whether to launch browsers in headless mode
+            max_idle_time: Seconds an unused browser may sit in the pool before it is closed
+            cleanup_interval: Seconds between idle-browser sweeps
+        """
+        self.size = size
+        self.headless = headless
+        self.max_idle_time = max_idle_time
+        self.cleanup_interval = cleanup_interval
+        self._playwright = None
+        self._idle = None
+        self._launched = 0
+        self._last_used = {}
+        self._cleanup_task = None
+    
+    async def _start(self):
+        """Start Playwright and the idle sweeper on first use."""
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+            self._idle = asyncio.Queue()
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+    
+    async def _launch(self):
+        """Launch a new Chromium instance counted against the pool size."""
+        self._launched += 1
+        try:
+            return await self._playwright.chromium.launch(
+                headless=self.headless,
+                slow_mo=SLOW_MO,
+                args=BROWSER_ARGS
+            )
+        except Exception:
+            self._launched -= 1
+            raise
+    
+    async def warm_up(self, count=None):
+        """Pre-launch browsers so the first acquire() does not pay the cold start."""
+        await self._start()
+        count = min(count or self.size, self.size - self._launched)
+        for _ in range(count):
+            await self.release(await self._launch())
+        logger.info("Browser pool warmed up with %d browsers", self._idle.qsize())
+    
+    async def acquire(self):
+        """Get a browser from the pool, launching one if the pool is not full yet."""
+        await self._start()
+        if self._idle.empty() and self._launched < self.size:
+            return await self._launch()
+        
+        browser = await self._idle.get()
+        self._last_used.pop(browser, None)
+        if not browser.is_connected():
+            logger.warning("Pooled browser disconnected, launching a replacement")
+            self._launched -= 1
+            return await self._launch()
+        return browser
+    
+    async def release(self, browser):
+        """Return a browser to the pool, or close it if the pool has shrunk below it."""
+        if not browser.is_connected():
+            self._launched -= 1
+            return
+        if self._launched > self.size:
+            self._launched -= 1
+            await browser.close()
+            return
+        self._last_used[browser] = time.monotonic()
+        self._idle.put_nowait(browser)
+    
+    async def resize(self, size):
+        """Change the pool size, closing idle browsers beyond it; busy ones close on release."""
+        self.size = size
+        while self._idle is not None and not self._idle.empty() and self._launched > size:
+            browser = self._idle.get_nowait()
+            self._last_used.pop(browser, None)
+            self._launched -= 1
+            await browser.close()
+    
+    async def _cleanup_loop(self):
+        """Close browsers that have been idle longer than max_idle_time."""
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            now = time.monotonic()
+            keep = []
+            while not self._idle.empty():
+                browser = self._idle.get_nowait()
+                if now - self._last_used.get(browser, now) > self.max_idle_time:
+                    self._last_used.pop(browser, None)
+                    self._launched -= 1
+                    await browser.close()
+                    logger.debug("Closed idle pooled browser")
+                else:
+                    keep.append(browser)
+            for browser in keep:
+                self._idle.put_nowait(browser)
+    
+    async def shutdown(self):
+        """Close every pooled browser and stop Playwright."""
+        if self._playwright is None:
+            return
+        self._cleanup_task.cancel()
+        while not self._idle.empty():
+            browser = self._idle.get_nowait()
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning("Error closing pooled browser: %s", e)
+        await self._playwright.stop()
+        self._playwright = None
+        self._idle = None
+        self._launched = 0
+        self._last_used = {}
+        self._cleanup_task = None
+
+# One pool per headless mode, shared by every authenticate() call
+_browser_pools = {}
+
+def get_browser_pool(headless=True):
+    """Get the shared browser pool for the given headless mode."""
+    if headless not in _browser_pools:
+        _browser_pools[headless] = BrowserPool(
+            size=int(os.getenv("CRIC10_BROWSER_POOL_SIZE", "1")),
+            headless=headless
+        )
+    return _browser_pools[headless]
+
+async def shutdown_browser_pools():
+    """Shut down all browser pools."""
+    for pool in _browser_pools.values():
+        await pool.shutdown()
+
+# Pooled browsers are bound to the event loop that launched them, so the
+# synchronous entry points share one long-lived loop instead of asyncio.run()
+_loop = None
+
+def run_sync(coro):
+    """Run an auth coroutine to completion on the module's shared event loop."""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+@atexit.register
+def _close_loop():
+    """Tear down pooled browsers and the shared loop at interpreter exit."""
+    if _loop is not None and not _loop.is_closed():
+        _loop.run_until_complete(shutdown_browser_pools())
+        _loop.close()
+
+async def block_unneeded_requests(route):
+    """Abort heavy resources and third-party trackers, let everything else through."""
+    request = route.request
+    host = urlparse(request.url).hostname or ""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or host.endswith(BLOCKED_DOMAINS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+def context_options(headless):
+    """
+    Browser context settings for the login flow.
+    
+    Headless runs keep the desktop width (the login button and wallet
+    indicators are desktop-layout elements) but paint a shorter page, skip
+    CSS animations and never start the site's service worker.
+    """
+    return {
+        "viewport": {"width": 1280, "height": 600} if headless else {"width": 1280, "height": 800},
+        "user_agent": USER_AGENT,
+        "reduced_motion": "reduce",
+        "service_workers": "block"
+    }
+
+async def new_auth_context(browser, headless, storage_state=None):
+    """Create a browser context configured for the login flow."""
+    context = await browser.new_context(storage_state=storage_state, **context_options(headless))
+    await context.route("**/*", block_unneeded_requests)
+    await context.add_init_script(AUTH_HELPERS_JS)
+    return context
+
+def storage_state_is_fresh(path):
+    """Check whether a saved browser session exists and is young enough to reuse."""
+    if not path:
+        return False
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return False
+    # Re-login a little before the site would expire the session itself
+    return age < SESSION_LIFETIME * 0.8
+
+# Hosts the login flow navigates to
+WARM_HOSTS = ("www.10cric.com", "www.10crics.com")
+
+async def warm_dns(hosts=WARM_HOSTS):
+    """Resolve the login hosts so the OS resolver cache is warm before Chromium navigates."""
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.getaddrinfo(host, 443) for host in hosts), return_exceptions=True)
+
+async def authenticate(headless=False, username=None, password=None, save=True,
+                       storage_state_path=STORAGE_STATE_FILE):
     """
     Authenticate with 10CRIC and extract authentication tokens.
     
     Args:
         headless (bool): Whether to run the browser in headless mode
+        username (str): Account username (defaults to CRIC10_USERNAME)
+        password (str): Account password (defaults to CRIC10_PASSWORD)
+        save (bool): Whether to write the tokens to .credentials.json
+        storage_state_path (str): Saved browser session to reuse and refresh, or None to always log in
         
     Returns:
         dict: Credentials including player_id and tokens, or None if authentication fails
     """
     # Get credentials from environment variables
-    username = os.getenv("CRIC10_USERNAME")
-    password = os.getenv("CRIC10_PASSWORD")
+    username = username or CRIC10_USERNAME
+    password = password or CRIC10_PASSWORD
     
     if not username or not password:
         logger.error("Credentials not found in .env file")
         return None
     
-    logger.info("Starting authentication process...")
-    with sync_playwright() as p:
-        # Setup browser
-        browser = p.chromium.launch(
-            headless=headless,
-            slow_mo=100
-        )
+    logger.debug("Starting authentication process...")
+    # Resolve the hosts in the background while the browser and context spin up;
+    # best effort only, navigation never waits for it
+    dns_warmup = asyncio.ensure_future(warm_dns())
+    pool = get_browser_pool(headless)
+    try:
+        browser = await pool.acquire()
+    except BaseException:
+        dns_warmup.cancel()
+        raise
+    restore_session = storage_state_is_fresh(storage_state_path)
+    context = None
+    page = None
+    
+    # Everything after acquire runs under the finally that closes the context and returns the browser
+    try:
+        try:
+            # Setup a fresh context with realistic browser configuration
+            context = await new_auth_context(browser, headless, storage_state_path if restore_session else None)
+        except Exception as e:
+            logger.error("Error creating browser context: %s", e)
+            return None
         
-        # Setup context with realistic browser configuration
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36"
-        )
+        page = await context.new_page()
         
-        page = context.new_page()
+        now_iso = datetime.now().isoformat()
+        credentials = None
+        if restore_session:
+            logger.debug("Restoring saved browser session...")
+            try:
+                await page.goto(SPORTS_PAGE_URL, timeout=30000, wait_until='domcontentloaded')
+                if await wait_for_login_indicator(page, timeout=5000):
+                    state, local_storage_items, credentials = await read_session(context, page, now_iso)
+            except Exception as e:
+                logger.warning("Error restoring saved session: %s", e)
+            
+            if credentials:
+                logger.info("Saved session is still logged in, skipping login form")
+            else:
+                # Any failure on the restore path falls back to a full login in a fresh context
+                logger.info("Saved session is no longer usable, logging in again")
+                # Another process may have removed it already
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(storage_state_path)
+                await context.close()
+                context = None
+                context = await new_auth_context(browser, headless)
+                page = await context.new_page()
         
-        try:
+        if not credentials:
             # Navigate to site and login
-            if not navigate_and_login(page, username, password):
+            if not await navigate_and_login(page, username, password):
                 return None
             
             # Navigate to sports page to ensure all tokens are loaded
-            logger.info("Navigating to sports page to load tokens...")
-            page.goto("https://www.10crics.com/cricket/indian-premier-league", timeout=30000)
-            time.sleep(10)
-            
-            # Extract and process authentication data
-            cookies = context.cookies()
-            local_storage_items = get_local_storage(page)
-            credentials = extract_credentials(local_storage_items, cookies)
+            logger.debug("Navigating to sports page to load tokens...")
+            await page.goto(SPORTS_PAGE_URL, timeout=30000, wait_until='domcontentloaded')
             
-            if credentials:
-                save_credentials(credentials)
-                logger.info(f"Authentication successful. Tokens saved to .credentials.json")
-                return credentials
-            else:
-                save_partial_data(local_storage_items, cookies)
+            state, local_storage_items, credentials = await read_session(context, page, now_iso)
+            if not credentials:
+                save_partial_data(local_storage_items, state["cookies"], now_iso)
                 return None
-                
-        except Exception as e:
-            logger.error(f"Error during authentication: {str(e)}")
-            capture_screenshot(page, "error_state.png")
-            return None
-        finally:
-            browser.close()
+        
+        if save:
+            save_credentials(credentials)
+            logger.info("Authentication successful. Tokens saved to .credentials.json")
+        if storage_state_path:
+            # Same state we just read; no need to ask the browser again
+            write_atomic(storage_state_path, orjson.dumps(state))
+        return credentials
+            
+    except Exception as e:
+        logger.error("Error during authentication: %s", e)
+        if page is not None:
+            await capture_screenshot(page, "error_state.jpg")
+        return None
+    finally:
+        dns_warmup.cancel()
+        if context is not None:
+            await context.close()
+        await pool.release(browser)
 
-def navigate_and_login(page, username, password):
+async def read_session(context, page, now_iso):
+    """
+    Wait for the sportsbook tokens and extract the credentials from the page's session.
+    
+    Returns:
+        tuple: (storage_state, localStorage items, credentials or None)
+    """
+    await wait_for_tokens(page)
+    
+    # storage_state returns cookies (HttpOnly included) and localStorage in one call
+    state = await context.storage_state()
+    local_storage_items = origin_local_storage(state, page.url)
+    return state, local_storage_items, extract_credentials(local_storage_items, state["cookies"], now_iso)
+
+async def authenticate_many(accounts, headless=True, concurrency=3):
+    """
+    Authenticate several accounts concurrently.
+    
+    Args:
+        accounts (list): (username, password) tuples
+        headless (bool): Whether to run the browsers in headless mode
+        concurrency (int): Maximum number of browsers running at once
+        
+    Returns:
+        list: Credentials (or None) for each account, in input order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    pool = get_browser_pool(headless)
+    # Grow the shared pool for this batch only; later single logins keep the configured size
+    previous_size = pool.size
+    await pool.resize(max(previous_size, concurrency))
+    
+    async def _bounded(username, password):
+        async with semaphore:
+            return await authenticate(headless=headless, username=username, password=password,
+                                      save=False, storage_state_path=None)
+    
+    try:
+        return await asyncio.gather(*[_bounded(username, password) for username, password in accounts])
+    finally:
+        await pool.resize(previous_size)
+
+async def navigate_and_login(page, username, password):
     """Navigate to 10CRIC and complete the login process."""
     try:
         # Navigate to homepage
-        logger.info("Navigating to homepage...")
-        response = page.goto("https://www.10cric.com", timeout=60000, wait_until='domcontentloaded')
+        logger.debug("Navigating to homepage...")
+        response = await page.goto("https://www.10cric.com", timeout=60000, wait_until='commit')
         
         if not response or not response.ok:
-            logger.error(f"Failed to load homepage. Status: {response.status if response else 'No response'}")
+            logger.error("Failed to load homepage. Status: %s", response.status if response else 'No response')
             return False
         
         # Open login modal
-        logger.info("Opening login modal...")
-        page.click('text="Log in"')
-        time.sleep(1)
-        
-        # Wait for login form
-        logger.info("Waiting for login form...")
-        page.wait_for_selector('input[type="email"], input[placeholder="Email"]', timeout=15000)
-        
-        # Fill credentials
-        logger.info("Filling login form...")
-        email_selector = 'input[type="email"], input[placeholder="Email"]'
-        password_selector = 'input[type="password"], input[placeholder="********"]'
+        logger.debug("Opening login modal...")
+        await page.click('text="Log in"')
         
-        email_element = page.query_selector(email_selector)
-        password_element = page.query_selector(password_selector)
-        
-        if not email_element or not password_element:
+        # Fill credentials; the locators wait for the login form to render
+        logger.debug("Filling login form...")
+        try:
+            await page.locator(EMAIL_SELECTOR).first.fill(username, timeout=15000)
+            await page.locator(PASSWORD_SELECTOR).first.fill(password, timeout=15000)
+        except PlaywrightTimeoutError:
             logger.error("Login form fields not found")
-            capture_screenshot(page, "login_form_not_found.png")
+            await capture_screenshot(page, "login_form_not_found.jpg")
             return False
-            
-        email_element.fill(username)
-        password_element.fill(password)
         
         # Submit form using multiple fallback methods
-        logger.info("Submitting login form...")
-        if not submit_login_form(page):
+        logger.debug("Submitting login form...")
+        if not await submit_login_form(page):
             return False
         
-        # Wait for login to complete
-        logger.info("Waiting for login to complete...")
-        time.sleep(5)
-        
-        # Verify login success
-        if verify_login_success(page):
+        # Wait for login to complete; only fall back to the slower checks if no indicator rendered
+        logger.debug("Waiting for login to complete...")
+        if await wait_for_login_indicator(page) or await verify_login_success(page):
             logger.info("Login successful!")
         else:
             logger.warning("Could not verify login visually, will continue checking for tokens")
@@ -137,168 +603,162 @@ def navigate_and_login(page, username, password):
         return True
         
     except Exception as e:
-        logger.error(f"Error during login: {str(e)}")
-        capture_screenshot(page, "login_error.png")
+        logger.error("Error during login: %s", e)
+        await capture_screenshot(page, "login_error.jpg")
         return False
 
-def submit_login_form(page):
+async def submit_login_form(page):
     """Submit login form using various fallback methods."""
     try:
         # Method 1: Submit by pressing Enter
         try:
-            page.focus('input[type="password"]')
-            page.press('input[type="password"]', 'Enter')
-            logger.info("Submitted form with Enter key")
+            await page.focus('input[type="password"]')
+            await page.press('input[type="password"]', 'Enter')
+            logger.debug("Submitted form with Enter key")
             return True
         except Exception as e:
-            logger.warning(f"Enter key submission failed: {str(e)}")
-        
-        # Method 2: Try various selectors with JavaScript
-        selectors = [
-            'button[data-testid="login button"]',
-            'button[data-uat="login-submit"]',
-            '.SignInWithLoginType_loginBtn__2DAce',
-            'form button',
-            'button:has-text("Log in")'
-        ]
-        
-        for selector in selectors:
-            try:
-                page.evaluate(f"() => document.querySelector('{selector}').click()")
-                logger.info(f"Clicked login button using selector: {selector}")
+            logger.warning("Enter key submission failed: %s", e)
+        
+        # Method 2: Click the first submit button found, all in one evaluate
+        try:
+            clicked = await page.evaluate(CLICK_FIRST_JS, SUBMIT_SELECTORS)
+            if clicked:
+                logger.debug("Clicked login button using selector: %s", clicked)
                 return True
-            except:
-                continue
+        except Exception as e:
+            logger.warning("Login button click failed: %s", e)
         
         # Method 3: Try removing backdrop and finding button
         try:
-            page.evaluate("""() => {
-                document.querySelectorAll('.MuiBackdrop-root').forEach(b => b.remove());
-                Array.from(document.querySelectorAll('button')).find(
-                    button => button.textContent.includes('Log in')
-                )?.click();
-            }""")
-            logger.info("Attempted login after removing backdrop")
+            await page.evaluate(REMOVE_BACKDROP_JS)
+            logger.debug("Attempted login after removing backdrop")
             return True
         except Exception as e:
-            logger.warning(f"Backdrop removal method failed: {str(e)}")
+            logger.warning("Backdrop removal method failed: %s", e)
             
         logger.error("All login submission methods failed")
         return False
     except Exception as e:
-        logger.error(f"Error submitting form: {str(e)}")
+        logger.error("Error submitting form: %s", e)
+        return False
+
+async def wait_for_login_indicator(page, timeout=15000):
+    """Wait until any logged-in indicator is rendered."""
+    try:
+        # Filter before .first: a hidden match earlier in the DOM must not mask a visible one,
+        # so "attached" here means a visible indicator is in the DOM
+        await page.locator(SUCCESS_SELECTOR).filter(visible=True).first.wait_for(state="attached", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        logger.warning("No login indicator appeared within %.0fs", timeout / 1000)
         return False
 
-def verify_login_success(page):
+async def snapshot(page):
+    """Read localStorage and the login indicator states in a single evaluate call."""
+    try:
+        return await page.evaluate(SNAPSHOT_JS, SUCCESS_INDICATORS)
+    except Exception as e:
+        logger.error("Error taking page snapshot: %s", e)
+        return {"localStorage": [], "indicators": [None] * len(SUCCESS_INDICATORS), "rupee": False}
+
+async def verify_login_success(page, page_snapshot=None):
     """Check if login was successful using visual indicators."""
-    success_indicators = [
-        '.WalletButton_trigger__xmZ98',
-        'button[data-uat="header-multiwallet-trigger"]',
-        '.balance',
-        '.user-balance',
-        '.logged-in',
-        '.deposit-button',
-        'button:has-text("Deposit")'
-    ]
-    
-    # Try each selector
-    for selector in success_indicators:
-        try:
-            if page.query_selector(selector):
-                logger.info(f"Login confirmed with indicator: {selector}")
-                return True
-        except:
-            pass
+    if page_snapshot is None:
+        page_snapshot = await snapshot(page)
     
-    # Try rupee symbol as fallback
-    try:
-        rupee_elements = page.evaluate('() => {' +
-            'return Array.from(document.querySelectorAll("*"))' +
-            '.filter(el => el.textContent.includes("₹")).length;' +
-        '}')
-        if rupee_elements > 0:
-            logger.info(f"Login confirmed with ₹ symbol ({rupee_elements} elements)")
+    for selector, present in zip(SUCCESS_INDICATORS, page_snapshot["indicators"]):
+        if present:
+            logger.debug("Login confirmed with indicator: %s", selector)
             return True
-    except:
-        pass
+    
+    # Rupee symbol in the rendered text (wallet balance) as fallback
+    if page_snapshot["rupee"]:
+        logger.debug("Login confirmed with ₹ symbol")
+        return True
+    
+    # Race the indicators inside the browser; returns as soon as one renders
+    try:
+        selector = await page.evaluate(WAIT_FOR_INDICATOR_JS, [SUCCESS_INDICATORS, 3000])
+    except Exception as e:
+        logger.warning("Error waiting for login indicator: %s", e)
+        selector = None
+    if selector:
+        logger.debug("Login confirmed with indicator: %s", selector)
+        return True
         
     return False
 
-def get_local_storage(page):
-    """Get localStorage contents from the page."""
+async def wait_for_tokens(page, timeout=15000):
+    """Wait until the sportsbook tokens are in localStorage."""
     try:
-        local_storage = page.evaluate("() => JSON.stringify(Object.entries(localStorage))")
-        return json.loads(local_storage)
-    except Exception as e:
-        logger.error(f"Error extracting localStorage: {str(e)}")
-        return []
+        # The app bundle writes the tokens right after hydrating; no need to wait for the network to idle
+        await page.wait_for_function(TOKENS_READY_JS, timeout=timeout, polling=100)
+        return True
+    except PlaywrightTimeoutError:
+        logger.warning("Sportsbook tokens not found in localStorage after %.0fs", timeout / 1000)
+        return False
+
+def origin_local_storage(state, url):
+    """Pick the (key, value) localStorage pairs for the page's origin out of a storage_state dict."""
+    parsed = urlparse(url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    for entry in state.get("origins", []):
+        if entry.get("origin") == origin:
+            return [(item["name"], item["value"]) for item in entry.get("localStorage", [])]
+    return []
+
+async def get_local_storage(page):
+    """Get localStorage contents from the page."""
+    return (await snapshot(page))["localStorage"]
 
-def extract_credentials(local_storage_items, cookies):
+def extract_credentials(local_storage_items, cookies, now_iso=None):
     """Extract authentication tokens from localStorage and cookies."""
-    player_id = None
-    sportsbook_token = None
-    session_cookie = None
-    session_sig = None
+    # Index localStorage and cookies once so the known keys are plain lookups
+    logger.debug("Extracting all localStorage items...")
+    local_storage = {
+        key: value.strip('"') if isinstance(value, str) else value
+        for key, value in local_storage_items
+    }
+    logger.debug("Extracting all cookies...")
+    cookie_values = {cookie.get("name"): cookie.get("value") for cookie in cookies}
     
     # Initialize a dictionary to store all credentials
     all_credentials = {
-        "timestamp": datetime.now().isoformat(),
-        "localStorage": {},
-        "cookies": {}
+        "timestamp": now_iso or datetime.now().isoformat(),
+        "localStorage": local_storage,
+        "cookies": cookie_values
     }
     
-    # Extract all localStorage items
-    logger.info("Extracting all localStorage items...")
-    for key, value in local_storage_items:
-        # Store everything in localStorage
-        all_credentials["localStorage"][key] = value.strip('"') if isinstance(value, str) else value
-        
-        # Also track specific keys we know are important
-        if key == "sportsbook:token":
-            sportsbook_token = value.strip('"')
-            logger.info("Found sportsbook:token")
-        elif key == "sportsbookPlayerId":
-            player_id = value.strip('"')
-            logger.info("Found sportsbookPlayerId")
-        elif key == "sportsbookToken" and not sportsbook_token:
-            sportsbook_token = value.strip('"')
-            logger.info("Found sportsbookToken")
-    
-    # Fallback: search for token keys
-    if not sportsbook_token:
-        for key, value in local_storage_items:
-            if "token" in key.lower() and "sport" in key.lower():
-                sportsbook_token = value.strip('"')
-                logger.info(f"Using fallback token from key: {key}")
-                break
-    
-    # Fallback: check for player ID alternatives
-    if not player_id:
-        for key, value in local_storage_items:
-            if key == "apc_user_id":
-                player_id = value
-                logger.info("Using apc_user_id as player_id")
-                break
-    
-    # Extract all cookies
-    logger.info("Extracting all cookies...")
-    for cookie in cookies:
-        cookie_name = cookie.get("name")
-        cookie_value = cookie.get("value")
-        
-        # Store all cookies
-        all_credentials["cookies"][cookie_name] = cookie_value
-        
-        # Track specific cookies we know are important
-        if cookie_name == "session":
-            session_cookie = cookie_value
-            logger.info("Found session cookie")
-        elif cookie_name == "session.sig":
-            session_sig = cookie_value
-            logger.info("Found session signature cookie")
-        elif cookie_name == "player_id" and not player_id:
-            player_id = cookie_value
-            logger.info("Found player_id in cookie")
+    sportsbook_token = local_storage.get("sportsbook:token") or local_storage.get("sportsbookToken")
+    if sportsbook_token:
+        logger.debug("Found sportsbook token")
+    else:
+        # Fallback: search for token keys
+        fallback_key = next(
+            (key for key in local_storage if "token" in key.lower() and "sport" in key.lower()),
+            None
+        )
+        if fallback_key:
+            sportsbook_token = local_storage[fallback_key]
+            logger.info("Using fallback token from key: %s", fallback_key)
+    
+    player_id = local_storage.get("sportsbookPlayerId")
+    if player_id:
+        logger.debug("Found sportsbookPlayerId")
+    elif local_storage.get("apc_user_id"):
+        player_id = local_storage["apc_user_id"]
+        logger.debug("Using apc_user_id as player_id")
+    elif cookie_values.get("player_id"):
+        player_id = cookie_values["player_id"]
+        logger.debug("Found player_id in cookie")
+    
+    # Track specific cookies we know are important
+    session_cookie = cookie_values.get("session")
+    session_sig = cookie_values.get("session.sig")
+    if session_cookie:
+        logger.debug("Found session cookie")
+    if session_sig:
+        logger.debug("Found session signature cookie")
     
     # Add critical tokens to the main credentials section
     all_credentials["player_id"] = player_id
@@ -319,56 +779,70 @@ def extract_credentials(local_storage_items, cookies):
     
     return all_credentials
 
+def write_atomic(path, payload):
+    """Write bytes to a temp file and swap it in, so readers never see a partial file."""
+    # Unique temp name per write, so overlapping processes never write into the same file
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp",
+                                    dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
 def save_credentials(credentials):
     """Save credentials to file."""
     try:
-        with open(".credentials.json", "w") as f:
-            json.dump(credentials, f, indent=2)
-        
-        # Also save a complete copy with all data for reference
-        with open(".credentials_complete.json", "w") as f:
-            json.dump(credentials, f, indent=2)
+        # .credentials.json already holds the complete data and is only machine-read
+        write_atomic(".credentials.json", orjson.dumps(credentials))
         
         # Log summary of what we saved
-        logger.info("Credentials saved to .credentials.json and .credentials_complete.json")
+        logger.debug("Credentials saved to .credentials.json")
         
         # Log critical credentials with truncation for security
         if credentials.get("player_id"):
             player_id = credentials["player_id"]
-            logger.info(f"Player ID: {player_id[:8]}...")
+            logger.debug("Player ID: %s...", player_id[:8])
         
         if credentials.get("sportsbook_token"):
             token = credentials["sportsbook_token"]
-            logger.info(f"Sportsbook Token: {token[:8]}...")
+            logger.debug("Sportsbook Token: %s...", token[:8])
         
         # Log counts of other data collected
         localStorage_count = len(credentials.get("localStorage", {}))
         cookies_count = len(credentials.get("cookies", {}))
-        logger.info(f"Saved {localStorage_count} localStorage items and {cookies_count} cookies")
+        logger.debug("Saved %d localStorage items and %d cookies", localStorage_count, cookies_count)
         
     except Exception as e:
-        logger.error(f"Error saving credentials: {str(e)}")
+        logger.error("Error saving credentials: %s", e)
 
-def save_partial_data(local_storage_items, cookies):
-    """Save partial authentication data for debugging."""
+def save_partial_data(local_storage_items, cookies, now_iso=None):
+    """Save partial authentication data for debugging (only when CRIC10_DEBUG=1)."""
+    if not DEBUG_ARTIFACTS:
+        return
     try:
-        with open(".partial_credentials.json", "w") as f:
-            json.dump({
+        with open(".partial_credentials.json", "wb") as f:
+            f.write(orjson.dumps({
                 "localStorage": {k: v for k, v in local_storage_items},
                 "cookies": {cookie.get("name"): cookie.get("value") for cookie in cookies},
-                "timestamp": datetime.now().isoformat()
-            }, f, indent=2)
+                "timestamp": now_iso or datetime.now().isoformat()
+            }, option=orjson.OPT_INDENT_2))
         logger.info("Partial data saved to .partial_credentials.json")
     except Exception as e:
-        logger.error(f"Error saving partial data: {str(e)}")
+        logger.error("Error saving partial data: %s", e)
 
-def capture_screenshot(page, filename):
-    """Capture a screenshot for debugging."""
+async def capture_screenshot(page, filename):
+    """Capture a screenshot for debugging (only when CRIC10_DEBUG=1)."""
+    if not DEBUG_ARTIFACTS:
+        return
     try:
-        page.screenshot(path=filename)
-        logger.info(f"Screenshot saved: {filename}")
+        await page.screenshot(path=filename, full_page=False, type="jpeg", quality=60)
+        logger.info("Screenshot saved: %s", filename)
     except Exception as e:
-        logger.error(f"Failed to capture screenshot: {str(e)}")
+        logger.error("Failed to capture screenshot: %s", e)
 
 def authenticate_and_get_credentials(headless: bool = True) -> bool:
     """
@@ -381,17 +855,14 @@ def authenticate_and_get_credentials(headless: bool = True) -> bool:
         True if authentication was successful, False otherwise
     """
     # Get credentials from environment
-    username = os.getenv("CRIC10_USERNAME")
-    password = os.getenv("CRIC10_PASSWORD")
-    
-    if not username or not password:
+    if not CRIC10_USERNAME or not CRIC10_PASSWORD:
         logger.error("Missing username or password in environment variables")
         return False
     
     # Run the authentication process
     try:
-        logger.info("Running authentication with credentials from environment")
-        result = authenticate(headless=headless)
+        logger.debug("Running authentication with credentials from environment")
+        result = run_sync(authenticate(headless=headless))
         
         if result:
             logger.info("Authentication successful")
@@ -400,9 +871,62 @@ def authenticate_and_get_credentials(headless: bool = True) -> bool:
             logger.error("Authentication failed")
             return False
     except Exception as e:
-        logger.error(f"Authentication error: {e}")
+        logger.error("Authentication error: %s", e)
         return False
 
+# Keep-alive session so repeated validations reuse the TLS connection;
+# headers that never change are set once here
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=8))
+_http_session.headers.update({
+    'content-type': 'application/json',
+    'x-tenant': '10CRIC',
+    # Add CSRF protection headers
+    'x-apollo-operation-name': 'CheckLoggedIn',
+    'apollo-require-preflight': 'true',
+    'User-Agent': USER_AGENT
+})
+
+# Both domains serve the GraphQL API, as the site might redirect; the one that
+# last validated successfully is kept first
+GRAPHQL_DOMAINS = [
+    "https://www.10crics.com",
+    "https://www.my10cric.com"
+]
+
+# CheckLoggedIn request body, serialized once; the session already sends the JSON content-type
+CHECK_LOGGED_IN_BODY = orjson.dumps({
+    "operationName": "CheckLoggedIn",
+    "variables": {},
+    "query": "query CheckLoggedIn { checkLoggedIn }"
+})
+
+# Seconds a successful CheckLoggedIn result is trusted, in-process and across processes
+VALIDATION_CACHE_TTL = 60
+VALIDATION_CACHE_FILE = ".validation_cache.json"
+
+def _token_fingerprint(player_id, sportsbook_token):
+    """Identify a credential pair without writing the token itself to the cache file."""
+    return hashlib.sha256(f"{player_id}:{sportsbook_token}".encode()).hexdigest()
+
+def _recently_validated(fingerprint):
+    """Check whether another run validated these exact tokens within the TTL."""
+    try:
+        with open(VALIDATION_CACHE_FILE, "rb") as f:
+            cached = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return False
+    return (cached.get("fingerprint") == fingerprint
+            and time.time() - cached.get("validated_at", 0) < VALIDATION_CACHE_TTL)
+
+def _remember_validation(fingerprint):
+    """Record a successful validation for other runs to reuse."""
+    try:
+        with open(VALIDATION_CACHE_FILE, "wb") as f:
+            f.write(orjson.dumps({"fingerprint": fingerprint, "validated_at": time.time()}))
+    except OSError as e:
+        logger.warning("Could not write validation cache: %s", e)
+
 def validate_credentials(credentials):
     """Validate if the current credentials are still valid using the CheckLoggedIn query."""
     player_id = credentials.get("player_id")
@@ -412,6 +936,11 @@ def validate_credentials(credentials):
         logger.error("Missing player_id or sportsbook_token in credentials")
         return False
     
+    fingerprint = _token_fingerprint(player_id, sportsbook_token)
+    if _recently_validated(fingerprint):
+        logger.debug("Credentials validated within the last %ds, skipping CheckLoggedIn", VALIDATION_CACHE_TTL)
+        return True
+    
     # Extract cookie data from credentials if available
     cookies_data = credentials.get("cookies", {})
     session_cookie = cookies_data.get("session", "")
@@ -424,48 +953,29 @@ def validate_credentials(credentials):
     if session_sig:
         cookies['session.sig'] = session_sig
     
-    # Use the CheckLoggedIn query to validate credentials
-    query = {
-        "operationName": "CheckLoggedIn",
-        "variables": {},
-        "query": "query CheckLoggedIn { checkLoggedIn }"
-    }
-    
     # Using requests library for validation - more reliable than curl
     try:
-        logger.info("Validating credentials using CheckLoggedIn query with requests")
-        
-        # Try both domains, as the site might redirect
-        domains = [
-            "https://www.10crics.com",
-            "https://www.my10cric.com"
-        ]
+        logger.debug("Validating credentials using CheckLoggedIn query with requests")
         
         headers = {
-            'content-type': 'application/json',
             'x-player-id': player_id,
-            'x-sportsbook-token': sportsbook_token,
-            'x-tenant': '10CRIC',
-            # Add CSRF protection headers
-            'x-apollo-operation-name': 'CheckLoggedIn',
-            'apollo-require-preflight': 'true',
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36'
+            'x-sportsbook-token': sportsbook_token
         }
         
-        for domain in domains:
+        for domain in list(GRAPHQL_DOMAINS):
             url = f"{domain}/graphql"
-            logger.info(f"Trying domain: {domain}")
+            logger.debug("Trying domain: %s", domain)
             
-            response = requests.post(
+            response = _http_session.post(
                 url,
-                json=query,
+                data=CHECK_LOGGED_IN_BODY,
                 headers=headers,
                 cookies=cookies,
                 timeout=10,
                 allow_redirects=True
             )
             
-            logger.info(f"Status code: {response.status_code}")
+            logger.debug("Status code: %s", response.status_code)
             
             if response.status_code == 200:
                 try:
@@ -476,15 +986,20 @@ def validate_credentials(credentials):
                         is_logged_in = data["data"]["checkLoggedIn"]
                         if is_logged_in:
                             logger.info("Credentials are valid")
+                            _remember_validation(fingerprint)
+                            # Try the domain that answered first next time
+                            if GRAPHQL_DOMAINS[0] != domain:
+                                GRAPHQL_DOMAINS.remove(domain)
+                                GRAPHQL_DOMAINS.insert(0, domain)
                             return True
                         else:
                             logger.info("User is not logged in according to API")
                     
                     # Check for errors
                     if "errors" in data:
-                        logger.info(f"API returned errors: {data['errors']}")
+                        logger.info("API returned errors: %s", data['errors'])
                 except json.JSONDecodeError:
-                    logger.info(f"Response is not valid JSON: {response.text[:100]}...")
+                    logger.info("Response is not valid JSON: %s...", response.text[:100])
             
             # If we got a response but it wasn't a successful validation,
             # try the next domain before giving up
@@ -494,9 +1009,23 @@ def validate_credentials(credentials):
         return False
         
     except Exception as e:
-        logger.error(f"Error validating credentials: {e}")
+        logger.error("Error validating credentials: %s", e)
         return False
 
+async def validate_credentials_async(credentials):
+    """
+    Validate credentials from async code without blocking the event loop.
+    
+    Args:
+        credentials (dict): Credentials as saved by save_credentials
+        
+    Returns:
+        bool: True if the CheckLoggedIn query confirms the session
+    """
+    return await asyncio.to_thread(validate_credentials, credentials)
+
+_validation_cache = {"mtime": None, "credentials": None, "validated_at": 0.0}
+
 def refresh_auth_if_needed(force_refresh=False, headless=True):
     """
     Check if authentication needs refresh and perform if necessary.
@@ -510,21 +1039,33 @@ def refresh_auth_if_needed(force_refresh=False, headless=True):
     """
     if force_refresh:
         logger.info("Forced authentication refresh")
-        return authenticate(headless=headless)
+        # A forced refresh means a real login, not restoring the saved session
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(STORAGE_STATE_FILE)
+        return run_sync(authenticate(headless=headless))
         
     try:
+        mtime = os.stat(".credentials.json").st_mtime
+        if (mtime == _validation_cache["mtime"]
+                and time.monotonic() - _validation_cache["validated_at"] < VALIDATION_CACHE_TTL):
+            return _validation_cache["credentials"]
+        
         with open(".credentials.json", "r") as f:
             credentials = json.load(f)
             
         if validate_credentials(credentials):
             logger.info("Credentials still valid, no refresh needed")
+            _validation_cache.update(mtime=mtime, credentials=credentials, validated_at=time.monotonic())
             return credentials
             
         logger.info("Credentials expired, refreshing authentication")
-        return authenticate(headless=headless)
+        # The saved browser session produced these tokens, so don't restore it
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(STORAGE_STATE_FILE)
+        return run_sync(authenticate(headless=headless))
     except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.warning(f"No valid credentials found ({e}), performing fresh authentication")
-        return authenticate(headless=headless)
+        logger.warning("No valid credentials found (%s), performing fresh authentication", e)
+        return run_sync(authenticate(headless=headless))
 
 if __name__ == "__main__":
-    authenticate()
\ No newline at end of file
+    run_sync(authenticate())
\ No newline at end of file
@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 
-import json
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 import os
 import argparse
+import hashlib
+import heapq
+import time
 from datetime import datetime
-import matplotlib.pyplot as plt
-from auth import refresh_auth_if_needed
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from auth import refresh_auth_if_needed, write_atomic
 
 # Configure logging
 logging.basicConfig(
@@ -24,139 +30,340 @@ PERFORMANCE_FILE = os.path.join(DATA_DIR, 'bet_performance.json')
 # Ensure data directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Headers that are the same for every history request
+BASE_HEADERS = MappingProxyType({
+    'accept': '*/*',
+    'accept-language': 'en-US,en;q=0.9',
+    'apollo-require-preflight': 'true',
+    'apollographql-client-name': 'frontoffice-client',
+    'content-type': 'application/json',
+    'origin': 'https://www.10crics.com',
+    'referer': 'https://www.10crics.com/betting-history/',
+    'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36',
+    'x-language': 'en',
+    'x-tenant': '10CRIC',
+})
+
+# (connect, read) timeout in seconds for each history request
+REQUEST_TIMEOUT = (5, 15)
+
+# Keep-alive session shared by every history request; transient gateway errors
+# are retried on the same connection pool before moving to the next domain.
+# Read timeouts are never retried, so a dead domain costs one REQUEST_TIMEOUT
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, connect=1, read=0, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=None)
+))
+_session.headers.update(BASE_HEADERS)
+
+CREDENTIALS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.credentials.json')
+
+# Parsed credentials, reused until the file is rewritten
+_credentials_cache = {'mtime_ns': None, 'data': None}
+
 def load_credentials():
     """Load credentials from .credentials.json file."""
     try:
-        cred_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.credentials.json')
-        with open(cred_path, 'r') as f:
-            return json.load(f)
+        mtime_ns = os.stat(CREDENTIALS_FILE).st_mtime_ns
+        if mtime_ns == _credentials_cache['mtime_ns']:
+            return _credentials_cache['data']
+        
+        with open(CREDENTIALS_FILE, 'rb') as f:
+            data = orjson.loads(f.read())
+        _credentials_cache.update(mtime_ns=mtime_ns, data=data)
+        return data
     except Exception as e:
         logger.error(f"Error loading credentials: {str(e)}")
         return {}
 
-def get_bet_history(hours=24, debug=False):
-    """Get bet history from 10CRIC API."""
-    try:
-        # Ensure valid credentials
-        refresh_auth_if_needed()
+# Bets requested per page and how many pages are batched into one request
+ITEMS_PER_PAGE = 50
+PAGES_PER_REQUEST = 10
+
+# Selection set shared by the single-page and batched history queries;
+# only the fields update_bet_history_log and the pagination read
+BET_PAGE_FIELDS = """{
+    bets {
+      internalBetUuid
+      ticketId
+      purchaseTime
+      betTypeName
+      odds
+      stake {
+        value
+      }
+      status
+      updateTime
+      events {
+        name
+        homeTeam
+        awayTeam
+        userBet
+        eventType
+        odds
+        status
+      }
+      payout {
+        value
+      }
+    }
+    hasNext
+    totalCount
+}"""
+
+GET_BET_PAGE_QUERY = "query GetBetPage($payload: ListBetPageRequest!) { listBetPage(payload: $payload) %s }" % BET_PAGE_FIELDS
+
+def bet_page_payload(hours, page):
+    """Build the ListBetPageRequest payload for one page of history."""
+    return {
+        "filter": {
+            "oddsType": "ODDS_TYPE_DECIMAL",
+            "hours": hours
+        },
+        "pagination": {
+            "page": page,
+            "itemsPerPage": ITEMS_PER_PAGE
+        }
+    }
+
+def build_bet_pages_query(hours, pages):
+    """
+    Build one GraphQL request that fetches several history pages through aliases.
+    
+    Args:
+        hours: Hours of history to fetch
+        pages: Page numbers to include
         
-        credentials = load_credentials()
-        player_id = credentials.get('player_id')
-        session_cookie = credentials.get('session')
-        sportsbook_token = credentials.get('sportsbook_token')
+    Returns:
+        Query dict ready to post, with one pN alias per page
+    """
+    variable_defs = ", ".join(f"$p{page}: ListBetPageRequest!" for page in pages)
+    selections = " ".join(f"p{page}: listBetPage(payload: $p{page}) {BET_PAGE_FIELDS}" for page in pages)
+    return {
+        "operationName": "GetBetPages",
+        "variables": {f"p{page}": bet_page_payload(hours, page) for page in pages},
+        "query": f"query GetBetPages({variable_defs}) {{ {selections} }}"
+    }
+
+def fetch_remaining_pages(domain, headers, cookies, hours, first_page, debug=False):
+    """
+    Fetch every page after the first in batched requests and merge their bets.
+    
+    Pages missing from a batched response are fetched one at a time.
+    
+    Args:
+        domain: Domain that answered the first page
+        headers: Request headers
+        cookies: Request cookies
+        hours: Hours of history to fetch
+        first_page: listBetPage result for page 1, extended in place
+        debug: Whether to log response details
         
-        if not (player_id and session_cookie):
-            logger.error("Missing player_id or session cookie in credentials")
-            return None
+    Returns:
+        The first page with all bets appended
+    """
+    if not first_page.get('hasNext'):
+        return first_page
+    
+    total_pages = -(-int(first_page.get('totalCount') or 0) // ITEMS_PER_PAGE)
+    remaining = list(range(2, total_pages + 1))
+    unfetched = []
+    for i in range(0, len(remaining), PAGES_PER_REQUEST):
+        pages = remaining[i:i + PAGES_PER_REQUEST]
+        response_data = {}
+        try:
+            response = _session.post(
+                f"{domain}/graphql",
+                headers=headers,
+                cookies=cookies,
+                json=build_bet_pages_query(hours, pages),
+                timeout=REQUEST_TIMEOUT
+            )
+            if debug:
+                logger.info(f"Response status for pages {pages[0]}-{pages[-1]}: {response.status_code}")
+            if response.status_code == 200:
+                response_data = response.json()
+        except Exception as e:
+            logger.warning(f"Error fetching pages {pages[0]}-{pages[-1]} from {domain}: {str(e)}")
         
-        # Prepare cookies and headers
-        cookies = {
-            'session': session_cookie,
-            'player_id': player_id,
-        }
+        data = response_data.get('data') or {}
+        results = {page: data.get(f"p{page}") for page in pages}
         
-        headers = {
-            'accept': '*/*',
-            'accept-language': 'en-US,en;q=0.9',
-            'apollo-require-preflight': 'true',
-            'apollographql-client-name': 'frontoffice-client',
-            'content-type': 'application/json',
-            'origin': 'https://www.10crics.com',
-            'referer': 'https://www.10crics.com/betting-history/',
-            'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36',
-            'x-language': 'en',
-            'x-player-id': player_id,
-            'x-sportsbook-token': sportsbook_token if sportsbook_token else '',
-            'x-tenant': '10CRIC',
-        }
+        # Null aliases (per-page errors) are retried one page at a time
+        missing = [page for page, bet_page in results.items() if not bet_page]
+        if missing:
+            logger.warning(f"Pages {missing} missing from batched response (errors: {response_data.get('errors')}), fetching them individually")
+            for page in missing:
+                query = {
+                    "operationName": "GetBetPage",
+                    "variables": {"payload": bet_page_payload(hours, page)},
+                    "query": GET_BET_PAGE_QUERY
+                }
+                results[page] = fetch_bet_page(domain, headers, cookies, query, debug)
+                if not results[page]:
+                    unfetched.append(page)
         
-        # GraphQL query for bet history
+        # Merge in page order
+        for page in pages:
+            if results[page]:
+                first_page['bets'].extend(results[page].get('bets') or [])
+    
+    if unfetched:
+        logger.warning(f"Could not fetch pages {unfetched}, returning partial history")
+    
+    first_page['hasNext'] = False
+    logger.info(f"Retrieved {len(first_page['bets'])} of {first_page.get('totalCount')} bets")
+    return first_page
+
+# Domains serving the GraphQL API
+HISTORY_DOMAINS = (
+    'https://www.10crics.com',
+    'https://www.my10cric.com',
+    'https://www.10cric10.com'
+)
+
+# Domain that answered the last history request; it is tried first
+_history_domain = {'last': HISTORY_DOMAINS[0]}
+
+# Seconds to wait on the preferred domain before also querying the others
+HEDGE_DELAY = 2
+
+def fetch_bet_page(domain, headers, cookies, query, debug=False):
+    """
+    Run the GetBetPage query against one domain.
+    
+    Returns:
+        The listBetPage result, or None if this domain did not return one
+    """
+    try:
+        url = f"{domain}/graphql"
+        logger.info(f"Fetching bet history from {domain}")
+        
+        response = _session.post(
+            url,
+            headers=headers,
+            cookies=cookies,
+            json=query,
+            timeout=REQUEST_TIMEOUT
+        )
+        
+        if debug:
+            logger.info(f"Response status from {domain}: {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            
+            if 'data' in data and data['data'] and 'listBetPage' in data['data'] and data['data']['listBetPage'] and 'bets' in data['data']['listBetPage']:
+                logger.info(f"Successfully retrieved bet history with {len(data['data']['listBetPage']['bets'])} bets from {domain}")
+                return data['data']['listBetPage']
+    except Exception as e:
+        logger.warning(f"Error with {domain}: {str(e)}")
+    return None
+
+# Seconds the validated cookies/headers are reused before checking auth again;
+# a rewritten credentials file (mtime_ns change) invalidates them sooner
+AUTH_CONTEXT_TTL = 300
+_auth_context = {'expires': 0.0, 'mtime_ns': None, 'cookies': None, 'headers': None}
+
+def get_auth_context():
+    """
+    Return request cookies and headers for the current session.
+    
+    Auth is refreshed and the credentials re-read at most once per AUTH_CONTEXT_TTL,
+    or as soon as the credentials file is rewritten, so polling callers don't
+    pay for it on every fetch.
+    
+    Returns:
+        (cookies, headers) tuple, or None if the credentials are incomplete
+    """
+    try:
+        mtime_ns = os.stat(CREDENTIALS_FILE).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    if (mtime_ns is not None
+            and mtime_ns == _auth_context['mtime_ns']
+            and time.monotonic() < _auth_context['expires']):
+        return _auth_context['cookies'], _auth_context['headers']
+    
+    # Ensure valid credentials
+    refresh_auth_if_needed()
+    
+    credentials = load_credentials()
+    player_id = credentials.get('player_id')
+    session_cookie = credentials.get('session')
+    sportsbook_token = credentials.get('sportsbook_token')
+    
+    if not (player_id and session_cookie):
+        logger.error("Missing player_id or session cookie in credentials")
+        return None
+    
+    # Prepare cookies and headers
+    cookies = {
+        'session': session_cookie,
+        'player_id': player_id,
+    }
+    
+    # Static headers are already on the session; only the per-account ones go here
+    headers = {
+        'x-player-id': player_id,
+        'x-sportsbook-token': sportsbook_token if sportsbook_token else '',
+    }
+    
+    # Keyed on the file version these values were read from
+    _auth_context.update(
+        expires=time.monotonic() + AUTH_CONTEXT_TTL,
+        mtime_ns=_credentials_cache['mtime_ns'],
+        cookies=cookies,
+        headers=headers
+    )
+    return cookies, headers
+
+def get_bet_history(hours=24, debug=False):
+    """Get bet history from 10CRIC API."""
+    try:
+        auth_context = get_auth_context()
+        if not auth_context:
+            return None
+        cookies, headers = auth_context
+        
+        # GraphQL query for bet history (first page; the rest are fetched once
+        # totalCount is known)
         query = {
             "operationName": "GetBetPage",
             "variables": {
-                "payload": {
-                    "filter": {
-                        "oddsType": "ODDS_TYPE_DECIMAL",
-                        "hours": hours
-                    },
-                    "pagination": {
-                        "page": 1,
-                        "itemsPerPage": 50
-                    }
-                }
+                "payload": bet_page_payload(hours, 1)
             },
-            "query": """query GetBetPage($payload: ListBetPageRequest!) {
-              listBetPage(payload: $payload) {
-                bets {
-                  internalBetUuid
-                  ticketId
-                  purchaseTime
-                  betType
-                  betTypeName
-                  odds
-                  stake {
-                    value
-                    currency
-                    __typename
-                  }
-                  status
-                  updateTime
-                  events {
-                    name
-                    homeTeam
-                    awayTeam
-                    userBet
-                    eventType
-                    odds
-                    status
-                    __typename
-                  }
-                  payout {
-                    value
-                    currency
-                    __typename
-                  }
-                  __typename
-                }
-                hasNext
-                totalCount
-                __typename
-              }
-            }"""
+            "query": GET_BET_PAGE_QUERY
         }
         
-        # Try domains in order of preference
-        domains = [
-            'https://www.10crics.com',
-            'https://www.my10cric.com',
-            'https://www.10cric10.com'
-        ]
+        # Steady state: one request to the domain that answered last time
+        preferred = _history_domain['last']
+        executor = ThreadPoolExecutor(max_workers=len(HISTORY_DOMAINS))
+        preferred_future = executor.submit(fetch_bet_page, preferred, headers, cookies, query, debug)
+        futures = {preferred_future: preferred}
+        try:
+            # If it fails or is slow, race the other domains alongside it and keep
+            # the first usable answer, so a dead domain costs HEDGE_DELAY, not a timeout
+            done, _ = wait([preferred_future], timeout=HEDGE_DELAY)
+            if not done or not preferred_future.result():
+                for domain in HISTORY_DOMAINS:
+                    if domain != preferred:
+                        futures[executor.submit(fetch_bet_page, domain, headers, cookies, query, debug)] = domain
+            
+            for future in as_completed(futures):
+                bet_page = future.result()
+                if bet_page:
+                    # Stay on the domain that answered, for the remaining pages and the next poll
+                    domain = futures[future]
+                    _history_domain['last'] = domain
+                    return fetch_remaining_pages(domain, headers, cookies, hours, bet_page, debug)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        for domain in domains:
-            try:
-                url = f"{domain}/graphql"
-                logger.info(f"Fetching bet history from {domain}")
-                
-                response = requests.post(
-                    url,
-                    headers=headers,
-                    cookies=cookies,
-                    json=query,
-                    timeout=15
-                )
-                
-                if debug:
-                    logger.info(f"Response status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    if 'data' in data and data['data'] and 'listBetPage' in data['data'] and data['data']['listBetPage'] and 'bets' in data['data']['listBetPage']:
-                        logger.info(f"Successfully retrieved bet history with {len(data['data']['listBetPage']['bets'])} bets")
-                        return data['data']['listBetPage']
-            except Exception as e:
-                logger.warning(f"Error with {domain}: {str(e)}")
-                continue
+        # No domain accepted these credentials; re-check auth on the next poll
+        _auth_context['expires'] = 0.0
         
         # If all API calls fail, try using mock data
         logger.warning("Failed to get bet history from any domain, trying to create mock data")
@@ -176,28 +383,31 @@ def create_mock_from_successful_bets():
         if not os.path.exists(app_bet_path):
             return None
             
-        with open(app_bet_path, 'r') as f:
-            data = json.load(f)
+        with open(app_bet_path, 'rb') as f:
+            data = orjson.loads(f.read())
             
         # Transform app bets to match API format
         mock_bets = []
+        now_ms = int(datetime.now().timestamp() * 1000)
         for bet in data:
             try:
-                # Handle different timestamp formats
-                purchase_time = ""
+                # Handle different timestamp formats; fromisoformat accepts both
+                # '%Y-%m-%d %H:%M:%S' and '%Y-%m-%dT%H:%M:%S.%f' without strptime's per-call format parsing
                 timestamp = bet.get('timestamp', '2025-03-25 00:00:00')
+                try:
+                    purchase_time = int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+                except (TypeError, ValueError):
+                    # If the format is unknown, use current time
+                    purchase_time = now_ms
                 
-                # Try different formats
-                for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f']:
-                    try:
-                        purchase_time = str(int(datetime.strptime(timestamp, fmt).timestamp() * 1000))
-                        break
-                    except ValueError:
-                        continue
-                
-                if not purchase_time:
-                    # If all formats fail, use current time
-                    purchase_time = str(int(datetime.now().timestamp() * 1000))
+                # Look up each field once and share it between the bet and its event
+                odds = bet.get('odds', "2.0")
+                odds_str = str(odds)
+                stake = bet.get('stake', 100)
+                currency = bet.get('currency', "INR")
+                status_upper = bet.get('status', 'PENDING').upper()
+                status = f"BET_STATUS_{status_upper}"
+                payout = str(float(stake) * float(odds)) if status_upper == 'WON' else "0.00"
                 
                 # Create a mock bet object
                 mock_bet = {
@@ -206,28 +416,28 @@ def create_mock_from_successful_bets():
                     "purchaseTime": purchase_time,
                     "betType": "BET_TYPE_SINGLE_BET",
                     "betTypeName": "Single bet",
-                    "odds": str(bet.get('odds', "2.0")),
+                    "odds": odds_str,
                     "stake": {
-                        "value": str(bet.get('stake', 100)),
-                        "currency": bet.get('currency', "INR"),
+                        "value": str(stake),
+                        "currency": currency,
                         "__typename": "SportMoney"
                     },
                     "payout": {
-                        "value": str(float(bet.get('stake', 100)) * float(bet.get('odds', 2.0)) if bet.get('status', '').upper() == 'WON' else "0.00"),
-                        "currency": bet.get('currency', "INR"),
+                        "value": payout,
+                        "currency": currency,
                         "__typename": "SportMoney"
                     },
-                    "status": f"BET_STATUS_{bet.get('status', 'PENDING').upper()}",
-                    "updateTime": str(int(datetime.now().timestamp() * 1000)),
+                    "status": status,
+                    "updateTime": str(now_ms),  # API sends updateTime as a string
                     "events": [
                         {
-                            "name": bet.get('event', bet.get('match_name', 'Unknown Event')),
+                            "name": bet['event'] if 'event' in bet else bet.get('match_name', 'Unknown Event'),
                             "homeTeam": bet.get('home_team', 'Home Team'),
                             "awayTeam": bet.get('away_team', 'Away Team'),
-                            "userBet": bet.get('selection', bet.get('selection_name', 'Unknown Selection')),
-                            "eventType": bet.get('market', bet.get('market_name', 'Unknown Market')),
-                            "odds": str(bet.get('odds', "2.0")),
-                            "status": f"BET_STATUS_{bet.get('status', 'PENDING').upper()}",
+                            "userBet": bet['selection'] if 'selection' in bet else bet.get('selection_name', 'Unknown Selection'),
+                            "eventType": bet['market'] if 'market' in bet else bet.get('market_name', 'Unknown Market'),
+                            "odds": odds_str,
+                            "status": status,
                             "__typename": "ProviderEventV2"
                         }
                     ],
@@ -235,7 +445,7 @@ def create_mock_from_successful_bets():
                 }
                 mock_bets.append(mock_bet)
             except Exception as e:
-                logger.warning(f"Error processing bet {bet.get('bet_id', 'unknown')}: {str(e)}")
+                logger.warning("Error processing bet %s: %s", bet.get('bet_id', 'unknown'), e)
                 continue
             
         if not mock_bets:
@@ -255,23 +465,103 @@ def create_mock_from_successful_bets():
         logger.warning(f"Traceback: {traceback.format_exc()}")
         return None
 
-def update_bet_history_log(bets):
-    """Update bet history log file with new bets."""
+def load_performance():
+    """Load the persisted performance aggregates, or None if there are none yet."""
+    try:
+        if os.path.exists(PERFORMANCE_FILE):
+            with open(PERFORMANCE_FILE, 'rb') as f:
+                performance = orjson.loads(f.read())
+            # Files written before incremental tracking can't be updated in place
+            if 'tracked_bets' in performance:
+                return performance
+    except Exception as e:
+        logger.warning(f"Error loading performance file: {str(e)}")
+    return None
+
+def history_digest(history):
+    """Fingerprint of a history dict, stored with the aggregates computed from it."""
+    return hashlib.blake2b(orjson.dumps(history, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+def apply_bet_to_performance(performance, bet, sign=1):
+    """
+    Add (or with sign=-1, remove) one history entry's contribution to the aggregates.
+    
+    Args:
+        performance: Performance dict as built by calculate_performance
+        bet: Bet history entry
+        sign: 1 to add the bet, -1 to take it back out
+    """
+    # Skip if not a clear status
+    if bet['status'] not in ['BET_STATUS_WON', 'BET_STATUS_LOST', 'BET_STATUS_PENDING']:
+        return
+    
+    stake = float(bet['stake'])
+    payout = float(bet['payout'])
+    profit = payout - stake
+    
+    # Update total metrics
+    performance['total_bets'] += sign
+    performance['total_stake'] += sign * stake
+    
+    if bet['status'] == 'BET_STATUS_WON':
+        performance['total_won'] += sign
+        performance['profit_loss'] += sign * profit
+    elif bet['status'] == 'BET_STATUS_LOST':
+        performance['total_lost'] += sign
+        performance['profit_loss'] -= sign * stake
+    elif bet['status'] == 'BET_STATUS_PENDING':
+        performance['pending'] += sign
+    
+    # Update market performance
+    for event in bet['events']:
+        market = performance['markets'].setdefault(event['market'], {
+            'bets': 0, 'won': 0, 'stake': 0, 'profit_loss': 0
+        })
+        
+        market['bets'] += sign
+        market['stake'] += sign * stake
+        
+        if bet['status'] == 'BET_STATUS_WON':
+            market['won'] += sign
+            market['profit_loss'] += sign * profit
+        elif bet['status'] == 'BET_STATUS_LOST':
+            market['profit_loss'] -= sign * stake
+
+def update_bet_history_log(bets, performance=None):
+    """
+    Update bet history log file with new bets.
+    
+    Args:
+        bets: Bets as returned by the GetBetPage query
+        performance: Optional performance aggregates to update in place for the bets that changed
+        
+    Returns:
+        The updated history dict, keyed by internalBetUuid
+    """
     # Load existing history
     history = {}
     try:
         if os.path.exists(HISTORY_FILE):
-            with open(HISTORY_FILE, 'r') as f:
-                history = json.load(f)
+            with open(HISTORY_FILE, 'rb') as f:
+                history = orjson.loads(f.read())
     except Exception as e:
         logger.warning(f"Error loading history file: {str(e)}")
     
+    # Aggregates saved against a different history (the process died, or one of the
+    # two files failed to write, between saves) can't be updated in place;
+    # calculate_performance rebuilds them instead
+    if performance is not None and performance.get('history_hash') != history_digest(history):
+        logger.warning("Performance aggregates are out of step with the history, rebuilding them")
+        performance = None
+    
     # Add new bets to history
+    changed = 0
     for bet in bets:
         bet_id = bet['internalBetUuid']
         
         # Skip if bet already in history and status hasn't changed
-        if bet_id in history and history[bet_id]['status'] == bet['status']:
+        previous = history.get(bet_id)
+        if previous and previous['status'] == bet['status']:
             continue
         
         # Format the event details
@@ -286,11 +576,20 @@ def update_bet_history_log(bets):
                 'status': event['status'],
             })
         
+        # Epoch milliseconds, parsed once here and stored as an int
+        purchase_time = int(bet['purchaseTime'])
+        
+        # A status change doesn't move the purchase time, so keep the date already derived for it
+        if previous and 'purchaseDate' in previous and int(previous.get('purchaseTime', -1)) == purchase_time:
+            purchase_date = previous['purchaseDate']
+        else:
+            purchase_date = datetime.fromtimestamp(purchase_time / 1000).strftime('%Y-%m-%d %H:%M:%S')
+        
         # Create history entry
         history[bet_id] = {
             'ticketId': bet['ticketId'],
-            'purchaseTime': bet['purchaseTime'],
-            'purchaseDate': datetime.fromtimestamp(int(bet['purchaseTime'])/1000).strftime('%Y-%m-%d %H:%M:%S'),
+            'purchaseTime': purchase_time,
+            'purchaseDate': purchase_date,
             'betType': bet['betTypeName'],
             'odds': bet['odds'],
             'stake': bet['stake']['value'],
@@ -301,112 +600,120 @@ def update_bet_history_log(bets):
             'placedByApp': bet_id.startswith('mock-')  # Assuming all mock bets are from our app
         }
         
-        logger.info(f"Added/updated bet {bet_id} in history")
+        # Move the bet's contribution from its old status to the new one
+        if performance is not None:
+            if previous:
+                apply_bet_to_performance(performance, previous, -1)
+            else:
+                performance['tracked_bets'] += 1
+            apply_bet_to_performance(performance, history[bet_id])
+        
+        changed += 1
+    
+    if changed:
+        logger.info("Added/updated %d bets in history", changed)
+        if performance is not None:
+            performance['history_hash'] = history_digest(history)
     
-    # Save updated history
+    # Nothing new since the last poll; the file on disk is already current
+    if not changed and os.path.exists(HISTORY_FILE):
+        return history
+    
+    # Save updated history via a temp file so a crash never leaves it half-written
     try:
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(history, f, indent=2)
+        write_atomic(HISTORY_FILE, orjson.dumps(history, option=orjson.OPT_INDENT_2))
     except Exception as e:
         logger.error(f"Error saving history file: {str(e)}")
     
     return history
 
-def calculate_performance(history):
-    """Calculate betting performance metrics."""
-    # Initialize metrics
-    performance = {
-        'total_bets': 0,
-        'total_stake': 0,
-        'total_won': 0,
-        'total_lost': 0,
-        'pending': 0,
-        'win_percentage': 0,
-        'profit_loss': 0,
-        'roi': 0,
-        'markets': {},
-        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    }
+def calculate_performance(history, performance=None):
+    """
+    Calculate betting performance metrics.
     
-    # Process each bet
-    for bet_id, bet in history.items():
-        # Skip if not a clear status
-        if bet['status'] not in ['BET_STATUS_WON', 'BET_STATUS_LOST', 'BET_STATUS_PENDING']:
-            continue
+    Args:
+        history: Bet history dict, keyed by internalBetUuid
+        performance: Aggregates already kept up to date by update_bet_history_log;
+            rebuilt from the full history when missing or not computed from this history
         
-        stake = float(bet['stake'])
-        payout = float(bet['payout'])
-        profit = payout - stake
-        
-        # Update total metrics
-        performance['total_bets'] += 1
-        performance['total_stake'] += stake
-        
-        if bet['status'] == 'BET_STATUS_WON':
-            performance['total_won'] += 1
-            performance['profit_loss'] += profit
-        elif bet['status'] == 'BET_STATUS_LOST':
-            performance['total_lost'] += 1
-            performance['profit_loss'] -= stake
-        elif bet['status'] == 'BET_STATUS_PENDING':
-            performance['pending'] += 1
+    Returns:
+        The performance dict, also written to PERFORMANCE_FILE
+    """
+    digest = history_digest(history)
+    if performance is None or performance.get('history_hash') != digest:
+        # Initialize metrics
+        performance = {
+            'total_bets': 0,
+            'total_stake': 0,
+            'total_won': 0,
+            'total_lost': 0,
+            'pending': 0,
+            'win_percentage': 0,
+            'profit_loss': 0,
+            'roi': 0,
+            'markets': {},
+            'tracked_bets': len(history),
+            'history_hash': digest
+        }
         
-        # Update market performance
-        for event in bet['events']:
-            market_key = event['market']
-            if market_key not in performance['markets']:
-                performance['markets'][market_key] = {
-                    'bets': 0, 'won': 0, 'stake': 0, 'profit_loss': 0
-                }
-            
-            performance['markets'][market_key]['bets'] += 1
-            performance['markets'][market_key]['stake'] += stake
-            
-            if bet['status'] == 'BET_STATUS_WON':
-                performance['markets'][market_key]['won'] += 1
-                performance['markets'][market_key]['profit_loss'] += profit
-            elif bet['status'] == 'BET_STATUS_LOST':
-                performance['markets'][market_key]['profit_loss'] -= stake
+        # Process each bet
+        for bet in history.values():
+            apply_bet_to_performance(performance, bet)
     
-    # Calculate percentages
-    if performance['total_won'] + performance['total_lost'] > 0:
-        performance['win_percentage'] = (performance['total_won'] / (performance['total_won'] + performance['total_lost'])) * 100
+    performance['last_updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
-    if performance['total_stake'] > 0:
-        performance['roi'] = (performance['profit_loss'] / performance['total_stake']) * 100
+    # Calculate percentages
+    settled = performance['total_won'] + performance['total_lost']
+    performance['win_percentage'] = (performance['total_won'] / settled) * 100 if settled > 0 else 0
+    performance['roi'] = (performance['profit_loss'] / performance['total_stake']) * 100 if performance['total_stake'] > 0 else 0
     
     # Save performance data
     try:
-        with open(PERFORMANCE_FILE, 'w') as f:
-            json.dump(performance, f, indent=2)
+        with open(PERFORMANCE_FILE, 'wb') as f:
+            f.write(orjson.dumps(performance, option=orjson.OPT_INDENT_2))
     except Exception as e:
         logger.error(f"Error saving performance file: {str(e)}")
     
     return performance
 
-def generate_performance_report(performance):
-    """Generate a readable performance report."""
-    report = []
+# Static part of the performance report, filled from the performance dict
+REPORT_SUMMARY_TEMPLATE = """========== BETTING PERFORMANCE SUMMARY ==========
+Total Bets: {total_bets}
+Win Rate: {win_percentage:.2f}%
+Total Stake: {total_stake:.2f}
+Profit/Loss: {profit_loss:.2f}
+ROI: {roi:.2f}%
+Pending Bets: {pending}
+"""
+
+def generate_performance_report(performance, top_markets=None):
+    """
+    Generate a readable performance report.
     
+    Args:
+        performance: Performance dict from calculate_performance
+        top_markets: Only list this many markets by profit/loss (all when None)
+        
+    Returns:
+        The report text
+    """
     # Overall stats
-    report.append("========== BETTING PERFORMANCE SUMMARY ==========")
-    report.append(f"Total Bets: {performance['total_bets']}")
-    report.append(f"Win Rate: {performance['win_percentage']:.2f}%")
-    report.append(f"Total Stake: {performance['total_stake']:.2f}")
-    report.append(f"Profit/Loss: {performance['profit_loss']:.2f}")
-    report.append(f"ROI: {performance['roi']:.2f}%")
-    report.append(f"Pending Bets: {performance['pending']}")
-    report.append("")
+    summary = REPORT_SUMMARY_TEMPLATE.format(**performance)
     
     # Market stats
-    report.append("========== MARKET PERFORMANCE ==========")
-    for market, stats in sorted(performance['markets'].items(), key=lambda x: x[1]['profit_loss'], reverse=True):
-        if stats['bets'] > 0:
-            win_rate = (stats['won'] / stats['bets']) * 100 if stats['bets'] > 0 else 0
-            roi = (stats['profit_loss'] / stats['stake']) * 100 if stats['stake'] > 0 else 0
-            report.append(f"{market}: {stats['bets']} bets, {win_rate:.1f}% win rate, {stats['profit_loss']:.2f} P/L, {roi:.2f}% ROI")
+    active_markets = [(market, stats) for market, stats in performance['markets'].items() if stats['bets'] > 0]
+    if top_markets is None:
+        ranked = sorted(active_markets, key=lambda x: x[1]['profit_loss'], reverse=True)
+    else:
+        ranked = heapq.nlargest(top_markets, active_markets, key=lambda x: x[1]['profit_loss'])
+    market_lines = "\n".join(
+        f"{market}: {stats['bets']} bets, {(stats['won'] / stats['bets']) * 100:.1f}% win rate, "
+        f"{stats['profit_loss']:.2f} P/L, "
+        f"{(stats['profit_loss'] / stats['stake']) * 100 if stats['stake'] > 0 else 0:.2f}% ROI"
+        for market, stats in ranked
+    )
     
-    return "\n".join(report)
+    return f"{summary}\n========== MARKET PERFORMANCE ==========" + (f"\n{market_lines}" if market_lines else "")
 
 def main():
     """Main function to retrieve and process bet history."""
@@ -414,6 +721,7 @@ def main():
     parser.add_argument('--hours', type=int, default=24, help='Hours of history to fetch')
     parser.add_argument('--all', action='store_true', help='Fetch all available history (overrides hours)')
     parser.add_argument('--report', action='store_true', help='Show performance report')
+    parser.add_argument('--top-markets', type=int, default=None, help='Only show the N most profitable markets in the report')
     parser.add_argument('--debug', action='store_true', help='Enable debug output')
     args = parser.parse_args()
     
@@ -430,16 +738,17 @@ def main():
     bets = bet_data.get('bets', [])
     logger.info(f"Retrieved {len(bets)} bets")
     
-    # Update bet history log
-    history = update_bet_history_log(bets)
+    # Update bet history log, folding changed bets into the saved aggregates
+    performance = load_performance()
+    history = update_bet_history_log(bets, performance)
     
     # Calculate performance metrics
-    performance = calculate_performance(history)
+    performance = calculate_performance(history, performance)
     logger.info(f"Calculated performance metrics for {performance['total_bets']} bets")
     
     # Show report if requested
     if args.report:
-        report = generate_performance_report(performance)
+        report = generate_performance_report(performance, args.top_markets)
         print(report)
 
 if __name__ == "__main__":
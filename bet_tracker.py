@@ -1,12 +1,15 @@
 import os
-import json
+import orjson
 import logging
 import datetime
+import time
 from typing import Dict, Any, List, Optional
 
 # Configure logging
 logger = logging.getLogger('10cric_bet_tracker')
 
+NS_PER_HOUR = 3600 * 1_000_000_000
+
 class BetTracker:
     """
     Tracks successful bets and prevents duplicate bet placement.
@@ -20,6 +23,7 @@ class BetTracker:
         """
         self.bet_history_file = bet_history_file
         self.bet_history = self._load_bet_history()
+        self._build_indexes()
         
     def _load_bet_history(self) -> List[Dict[str, Any]]:
         """
@@ -30,8 +34,8 @@ class BetTracker:
         """
         try:
             if os.path.exists(self.bet_history_file):
-                with open(self.bet_history_file, "r") as f:
-                    return json.load(f)
+                with open(self.bet_history_file, "rb") as f:
+                    return orjson.loads(f.read())
             else:
                 logger.info(f"No existing bet history file found at {self.bet_history_file}. Creating new history.")
                 return []
@@ -39,15 +43,67 @@ class BetTracker:
             logger.error(f"Error loading bet history: {e}")
             return []
     
+    def _build_indexes(self):
+        """Index the loaded history by selection and by bet ID for constant-time lookups."""
+        self._by_selection = {}
+        self._by_bet_id = {}
+        for bet in self.bet_history:
+            self._index_bet(bet)
+    
+    def _index_bet(self, bet: Dict[str, Any]):
+        """Add one bet record to the lookup indexes."""
+        # Records written before timestamp_ns existed get it derived once here;
+        # a missing or unparseable timestamp sorts as oldest instead of failing the load
+        if "timestamp_ns" not in bet:
+            try:
+                bet["timestamp_ns"] = int(datetime.datetime.fromisoformat(bet.get("timestamp")).timestamp() * 1_000_000_000)
+            except (TypeError, ValueError):
+                logger.warning(f"Bet {bet.get('bet_id')} has no valid timestamp, treating it as oldest")
+                bet["timestamp_ns"] = 0
+        key = (bet["event_id"], bet["market_id"], bet["selection_id"])
+        self._by_selection.setdefault(key, []).append(bet)
+        self._by_bet_id[bet["bet_id"]] = bet
+    
     def _save_bet_history(self):
         """Save bet history to file."""
         try:
-            with open(self.bet_history_file, "w") as f:
-                json.dump(self.bet_history, f, indent=2)
+            with open(self.bet_history_file, "wb") as f:
+                f.write(orjson.dumps(self.bet_history, option=orjson.OPT_INDENT_2))
             logger.info(f"Bet history saved to {self.bet_history_file}")
         except Exception as e:
             logger.error(f"Error saving bet history: {e}")
     
+    def _append_bet_record(self, bet_record: Dict[str, Any]):
+        """
+        Append one record to the JSON array on disk without rewriting the earlier entries.
+        
+        The file stays a regular indented JSON list, so other readers are unaffected;
+        anything unexpected falls back to a full save.
+        """
+        try:
+            with open(self.bet_history_file, "r+b") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                # Find the closing bracket of the array and the last element before it
+                f.seek(max(size - 4096, 0))
+                tail = f.read()
+                close = tail.rfind(b"]")
+                if close == -1 or tail[close + 1:].strip():
+                    raise ValueError("history file does not end with a JSON array")
+                before = tail[:close].rstrip()
+                if not before:
+                    raise ValueError("history file tail too short to append safely")
+                entry = orjson.dumps(bet_record, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n  ")
+                # "[]" gets its first element, anything else is continued with a comma
+                separator = b"\n  " if before.endswith(b"[") else b",\n  "
+                f.seek(size - len(tail) + len(before))
+                f.truncate()
+                f.write(separator + entry + b"\n]")
+            logger.info(f"Bet history saved to {self.bet_history_file}")
+        except (OSError, ValueError) as e:
+            logger.debug(f"Appending to bet history failed ({e}), rewriting file")
+            self._save_bet_history()
+    
     def is_duplicate_bet(self, event_id: str, market_id: str, selection_id: str, hours_window: int = 24) -> bool:
         """
         Check if a bet is a duplicate within the specified time window.
@@ -61,19 +117,12 @@ class BetTracker:
         Returns:
             True if the bet is a duplicate, False otherwise
         """
-        current_time = datetime.datetime.now()
-        time_threshold = current_time - datetime.timedelta(hours=hours_window)
-        
-        # Convert threshold to string format for comparison
-        time_threshold_str = time_threshold.isoformat()
+        # Integer nanosecond threshold, compared against each bet's timestamp_ns
+        time_threshold_ns = time.time_ns() - hours_window * NS_PER_HOUR
         
-        for bet in self.bet_history:
-            # Check if this bet matches our criteria for a duplicate
-            if (bet["event_id"] == event_id and 
-                bet["market_id"] == market_id and 
-                bet["selection_id"] == selection_id and
-                bet["timestamp"] > time_threshold_str):
-                
+        # Only bets on this exact selection can be duplicates; newest first
+        for bet in reversed(self._by_selection.get((event_id, market_id, selection_id), [])):
+            if bet["timestamp_ns"] > time_threshold_ns:
                 logger.info(f"Duplicate bet found: Event ID {event_id}, Market ID {market_id}, Selection {selection_id}")
                 logger.info(f"Previous bet was placed at {bet['timestamp']}")
                 return True
@@ -109,6 +158,9 @@ class BetTracker:
         Returns:
             The recorded bet entry
         """
+        # One clock read; the ISO form is kept for readers of successful_bets.json
+        now_ns = time.time_ns()
+        
         # Create bet record
         bet_record = {
             "bet_id": bet_id,
@@ -122,15 +174,17 @@ class BetTracker:
             "odds": odds,
             "stake": stake,
             "potential_return": round(stake * odds, 2),
-            "timestamp": datetime.datetime.now().isoformat(),
+            "timestamp": datetime.datetime.fromtimestamp(now_ns / 1_000_000_000).isoformat(),
+            "timestamp_ns": now_ns,
             "status": "placed"
         }
         
         # Add to history
         self.bet_history.append(bet_record)
+        self._index_bet(bet_record)
         
         # Save updated history
-        self._save_bet_history()
+        self._append_bet_record(bet_record)
         
         logger.info(f"Recorded successful bet: {bet_id} on {match_name} - {market_name} - {selection_name}")
         return bet_record
@@ -148,8 +202,8 @@ class BetTracker:
         if hours is None:
             return self.bet_history
             
-        time_threshold = (datetime.datetime.now() - datetime.timedelta(hours=hours)).isoformat()
-        return [bet for bet in self.bet_history if bet["timestamp"] > time_threshold]
+        time_threshold_ns = time.time_ns() - hours * NS_PER_HOUR
+        return [bet for bet in self.bet_history if bet["timestamp_ns"] > time_threshold_ns]
     
     def get_bet_summary(self) -> Dict[str, Any]:
         """
@@ -202,13 +256,13 @@ class BetTracker:
         Returns:
             True if the update was successful, False otherwise
         """
-        for bet in self.bet_history:
-            if bet["bet_id"] == bet_id:
-                bet["status"] = new_status
-                bet["status_updated"] = datetime.datetime.now().isoformat()
-                self._save_bet_history()
-                logger.info(f"Updated bet {bet_id} status to {new_status}")
-                return True
-                
+        bet = self._by_bet_id.get(bet_id)
+        if bet is not None:
+            bet["status"] = new_status
+            bet["status_updated"] = datetime.datetime.now().isoformat()
+            self._save_bet_history()
+            logger.info(f"Updated bet {bet_id} status to {new_status}")
+            return True
+            
         logger.warning(f"Bet ID {bet_id} not found in history")
         return False 
\ No newline at end of file
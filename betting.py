@@ -1,8 +1,10 @@
-import json
-import subprocess
 import os
 import uuid
+import functools
 import logging
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any, Optional
 
 # Configure logging
@@ -12,6 +14,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger('10cric_betting')
 
+GRAPHQL_URL = "https://www.10crics.com/graphql"
+
+# Keep-alive session so consecutive bets reuse the TCP/TLS connection
+# instead of spawning curl for every request
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=32))
+_http_session.headers.update({
+    'content-type': 'application/json',
+    'x-tenant': '10CRIC',
+    'x-apollo-operation-name': 'placeBet',
+    'apollo-require-preflight': 'true'
+})
+
+CREDENTIALS_FILE = ".credentials.json"
+
+# Payloads and responses are saved here for reference; created once at import
+BETS_DIR = "bets"
+os.makedirs(BETS_DIR, exist_ok=True)
+
+# Payload and response files are written compact; BET_PRETTY_JSON=1 indents them
+BET_DUMP_OPTION = orjson.OPT_INDENT_2 if os.getenv("BET_PRETTY_JSON") == "1" else 0
+
+PLACE_BET_QUERY = "mutation placeBet($payload: PlaceBetRequest!) {\n  placeBet(payload: $payload) {\n    betId\n    __typename\n  }\n}"
+
+# Parsed credentials file, reused until the file's mtime changes (e.g. after an auth refresh)
+_credentials_cache = {'mtime_ns': None, 'data': None}
+
 def get_credentials() -> tuple:
     """
     Get player ID and sportsbook token from environment or credentials file.
@@ -26,19 +55,26 @@ def get_credentials() -> tuple:
     # If not in environment, try to load from credentials file
     if not player_id or not sportsbook_token:
         try:
-            with open(".credentials.json", "r") as f:
-                credentials = json.load(f)
-                player_id = credentials.get("player_id")
-                sportsbook_token = credentials.get("sportsbook_token")
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Failed to load credentials from file: {e}")
+            mtime_ns = os.stat(CREDENTIALS_FILE).st_mtime_ns
+            if mtime_ns != _credentials_cache['mtime_ns']:
+                with open(CREDENTIALS_FILE, "rb") as f:
+                    _credentials_cache.update(mtime_ns=mtime_ns, data=orjson.loads(f.read()))
+            credentials = _credentials_cache['data']
+            player_id = credentials.get("player_id")
+            sportsbook_token = credentials.get("sportsbook_token")
+        except (FileNotFoundError, orjson.JSONDecodeError) as e:
+            logger.error("Failed to load credentials from file: %s", e)
     
     return player_id, sportsbook_token
 
+@functools.lru_cache(maxsize=1)
 def get_constants() -> Dict[str, str]:
     """
     Get constant values from environment variables.
     
+    The environment is read once per process; the returned dictionary is
+    shared, so callers must not modify it.
+    
     Returns:
         Dictionary of constant values
     """
@@ -89,6 +125,9 @@ def create_bet_payload(
     if not bet_id:
         bet_id = str(uuid.uuid4())
     
+    # The odds string appears on both the bet and its selection
+    odds_str = str(odds)
+    
     # Create the bet payload
     payload = {
         "operationName": "placeBet",
@@ -99,7 +138,7 @@ def create_bet_payload(
                     "stake": str(stake),
                     "oddsType": "ODDS_TYPE_DECIMAL",
                     "betType": "BET_TYPE_SINGLE_BET",
-                    "odds": str(odds),
+                    "odds": odds_str,
                     "potentialReturn": str(potential_return),
                     "selections": [
                         {
@@ -111,7 +150,7 @@ def create_bet_payload(
                             "marketLineId": market_line_id,
                             "sportId": constants["sport_id"],
                             "sportName": constants["sport_name"],
-                            "odds": str(odds),
+                            "odds": odds_str,
                             "pageSource": "PAGE_SOURCE_EVENT_PAGE",
                             "earlyPayoutId": 3
                         }
@@ -124,7 +163,7 @@ def create_bet_payload(
                 "playerId": player_id
             }
         },
-        "query": "mutation placeBet($payload: PlaceBetRequest!) {\n  placeBet(payload: $payload) {\n    betId\n    __typename\n  }\n}"
+        "query": PLACE_BET_QUERY
     }
     
     return payload
@@ -155,13 +194,7 @@ def place_bet(
     Returns:
         Dictionary containing the API response or error
     """
-    player_id, sportsbook_token = get_credentials()
-    
-    if not player_id or not sportsbook_token:
-        logger.error("Missing player credentials")
-        return {"error": "Missing player credentials"}
-    
-    # Create bet payload
+    # Create bet payload; it carries the credentials, so they are only looked up once
     payload = create_bet_payload(
         selection_id=selection_id,
         event_id=event_id,
@@ -172,62 +205,71 @@ def place_bet(
         bet_id=bet_id
     )
     
+    if not payload:
+        return {"error": "Missing player credentials"}
+    
     # Save payload for reference
-    os.makedirs("bets", exist_ok=True)
-    with open(f"bets/bet_payload_{bet_id or 'new'}.json", "w") as f:
-        json.dump(payload, f, indent=2)
+    with open(f"{BETS_DIR}/bet_payload_{bet_id or 'new'}.json", "wb") as f:
+        f.write(orjson.dumps(payload, option=BET_DUMP_OPTION))
     
-    logger.info(f"Bet payload created with ID: {payload['variables']['payload']['bet']['id']}")
-    logger.info(f"Stake: {stake}, Odds: {odds}, Potential Return: {payload['variables']['payload']['bet']['potentialReturn']}")
+    bet = payload["variables"]["payload"]["bet"]
+    logger.info("Bet payload created with ID: %s", bet["id"])
+    logger.info("Stake: %s, Odds: %s, Potential Return: %s", stake, odds, bet["potentialReturn"])
     
     # If dry run, don't actually place the bet
     if dry_run:
         logger.info("DRY RUN: Bet not placed. Payload saved to file.")
         return {"status": "dry_run", "payload": payload}
     
-    # Construct the curl command
-    curl_command = f"""
-    curl 'https://www.10crics.com/graphql' \\
-      -H 'content-type: application/json' \\
-      -H 'x-player-id: {player_id}' \\
-      -H 'x-sportsbook-token: {sportsbook_token}' \\
-      -H 'x-tenant: 10CRIC' \\
-      -H 'x-apollo-operation-name: placeBet' \\
-      -H 'apollo-require-preflight: true' \\
-      --data-raw '{json.dumps(payload)}'
-    """
+    player_id = payload["variables"]["payload"]["playerId"]
+    sportsbook_token = payload["variables"]["payload"]["sportToken"]
     
-    # Execute the curl command
+    # Execute the API call
     try:
         logger.info("Placing bet...")
-        result = subprocess.run(curl_command, shell=True, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"Error executing curl command: {result.stderr}")
-            return {"error": "Failed to execute API call", "details": result.stderr}
-            
-        response_data = json.loads(result.stdout)
+        response = _http_session.post(
+            GRAPHQL_URL,
+            data=orjson.dumps(payload),
+            headers={
+                'x-player-id': player_id,
+                'x-sportsbook-token': sportsbook_token
+            },
+            timeout=10
+        )
+        response_data = orjson.loads(response.content)
         
         # Save the response for reference
-        with open(f"bets/bet_response_{bet_id or 'new'}.json", "w") as f:
-            json.dump(response_data, f, indent=2)
+        with open(f"{BETS_DIR}/bet_response_{bet_id or 'new'}.json", "wb") as f:
+            f.write(orjson.dumps(response_data, option=BET_DUMP_OPTION))
         
         # Check if bet was placed successfully
         bet_id = response_data.get("data", {}).get("placeBet", {}).get("betId")
         if bet_id:
-            logger.info(f"Bet placed successfully! Bet ID: {bet_id}")
+            logger.info("Bet placed successfully! Bet ID: %s", bet_id)
             return {"status": "success", "bet_id": bet_id, "response": response_data}
         else:
-            logger.error(f"Bet placement failed: {response_data}")
+            logger.error("Bet placement failed: %s", response_data)
             return {"status": "error", "response": response_data}
             
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing response: {e}")
+    except orjson.JSONDecodeError as e:
+        logger.error("Error parsing response: %s", e)
         return {"error": "Failed to parse API response", "details": str(e)}
+    except requests.RequestException as e:
+        logger.error("Error executing API call: %s", e)
+        return {"error": "Failed to execute API call", "details": str(e)}
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         return {"error": "Unexpected error", "details": str(e)}
 
+# (field, display name) pairs checked by validate_selection
+REQUIRED_SELECTION_FIELDS = (
+    ("selection_id", "Selection ID"),
+    ("event_id", "Event ID"),
+    ("market_id", "Market ID"),
+    ("market_line_id", "Market Line ID"),
+    ("odds", "Odds")
+)
+
 def validate_selection(selection_data: Dict[str, Any]) -> Dict[str, str]:
     """
     Validate selection data to ensure it has all required fields.
@@ -238,20 +280,11 @@ def validate_selection(selection_data: Dict[str, Any]) -> Dict[str, str]:
     Returns:
         Dictionary of validation errors or empty dict if valid
     """
-    errors = {}
-    required_fields = {
-        "selection_id": "Selection ID",
-        "event_id": "Event ID",
-        "market_id": "Market ID",
-        "market_line_id": "Market Line ID",
-        "odds": "Odds"
+    return {
+        field: f"{name} is required"
+        for field, name in REQUIRED_SELECTION_FIELDS
+        if not selection_data.get(field)
     }
-    
-    for field, name in required_fields.items():
-        if field not in selection_data or not selection_data[field]:
-            errors[field] = f"{name} is required"
-    
-    return errors
 
 if __name__ == "__main__":
     print("10CRIC Betting Module")
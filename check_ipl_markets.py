@@ -4,22 +4,23 @@ import logging
 import argparse
 from auth import authenticate, refresh_auth_if_needed
 from market_monitor import SimpleMarketMonitor
+from ist_time import set_mock_time
 import json
 import sys
 import time
 import random
-import datetime
-import pytz
 from typing import Dict, List, Any, Optional, Tuple
 
-# Configure logging
+# Configure logging; force replaces the console-only config installed by the
+# imported modules, which would otherwise keep the log file from being written
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler("ipl_market_check.log"),
         logging.StreamHandler()
-    ]
+    ],
+    force=True
 )
 logger = logging.getLogger('ipl_market_check')
 
@@ -35,31 +36,6 @@ CONFIG_FILE = 'config.json'
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-# Global variable to store mock time for testing
-MOCK_TIME = None
-
-def get_current_ist_time():
-    """Get current time in IST timezone."""
-    ist_tz = pytz.timezone('Asia/Kolkata')
-    
-    # Use mock time if set (for testing)
-    if MOCK_TIME:
-        try:
-            # Parse the mock time and convert to IST
-            if isinstance(MOCK_TIME, str):
-                dt = datetime.datetime.fromisoformat(MOCK_TIME.replace('Z', '+00:00'))
-                return dt.astimezone(ist_tz)
-        except Exception as e:
-            logger.warning(f"Error parsing mock time: {e}, using real time")
-    
-    # Use real time
-    now_ist = datetime.datetime.now(ist_tz)
-    return now_ist
-
-def format_ist_time(dt):
-    """Format datetime object to IST time string."""
-    return dt.strftime('%Y-%m-%d %H:%M:%S %Z')
-
 def setup_authentication(force_refresh=False, headless=False):
     """
     Setup or refresh authentication.
@@ -84,6 +60,7 @@ def main():
     parser.add_argument("--auth", action="store_true", help="Force authentication refresh")
     parser.add_argument("--headless", action="store_true", help="Run browser in headless mode")
     parser.add_argument("--event-id", help="Specific event ID to check")
+    parser.add_argument("--event-ids", help="Comma-separated event IDs to prefetch in batched requests (with --prefetch-only)")
     parser.add_argument("--match-name", help="Match name for display purposes")
     parser.add_argument("--auto-bet", action="store_true", help="Automatically place bets on sanctioned markets")
     
@@ -100,10 +77,8 @@ def main():
     args = parser.parse_args()
     
     # Set mock time if provided
-    global MOCK_TIME
     if args.mock_time:
-        MOCK_TIME = args.mock_time
-        logger.info(f"Using mock time: {MOCK_TIME}")
+        set_mock_time(args.mock_time)
     
     # Force use mock data if specified
     if args.use_mock:
@@ -121,9 +96,9 @@ def main():
     # Always show a brief betting summary at startup
     bet_summary = monitor.bet_tracker.get_bet_summary()
     logger.info("\n=== Betting Summary ===")
-    logger.info(f"Total bets placed: {bet_summary['total_bets']}")
-    logger.info(f"Total stake: {bet_summary['total_stake']}")
-    logger.info(f"Recent bets (24h): {bet_summary['recent_bets']['count']}")
+    logger.info("Total bets placed: %s", bet_summary['total_bets'])
+    logger.info("Total stake: %s", bet_summary['total_stake'])
+    logger.info("Recent bets (24h): %s", bet_summary['recent_bets']['count'])
     
     # If just showing history, no need for authentication
     if args.show_history and not args.event_id:
@@ -138,9 +113,9 @@ def main():
         matches = get_upcoming_ipl_matches()
         
         if matches:
-            logger.info(f"Found {len(matches)} IPL matches")
+            logger.info("Found %d IPL matches", len(matches))
             for idx, match in enumerate(matches, 1):
-                logger.info(f"{idx}. {match.get('name')} (ID: {match.get('id')})")
+                logger.info("%d. %s (ID: %s)", idx, match.get('name'), match.get('id'))
             return
         else:
             logger.warning("No IPL matches found")
@@ -156,9 +131,18 @@ def main():
     else:
         logger.info("Auto-betting is disabled (use --auto-bet to enable)")
     
+    # Prefetch mode for several events - fetch them in batched requests and exit (no betting)
+    if args.prefetch_only and args.event_ids:
+        event_ids = [event_id.strip() for event_id in args.event_ids.split(",") if event_id.strip()]
+        logger.info("Running in prefetch-only mode for %d events", len(event_ids))
+        results = monitor.prefetch_markets(event_ids)
+        fetched = sum(1 for markets in results.values() if markets is not None)
+        logger.info("Prefetched markets for %d/%d events", fetched, len(event_ids))
+        return
+    
     # Prefetch mode - just get market data and exit (no betting)
     if args.prefetch_only and args.event_id:
-        logger.info(f"Running in prefetch-only mode for event {args.event_id}")
+        logger.info("Running in prefetch-only mode for event %s", args.event_id)
         monitor.check_markets(args.event_id, args.match_name, prefetch_only=True)
         return
     
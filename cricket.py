@@ -1,7 +1,9 @@
 import json
-import subprocess
 import os
 import logging
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
@@ -12,6 +14,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger('10cric_cricket')
 
+GRAPHQL_URL = "https://www.10crics.com/graphql"
+
+IPL_LEAGUE_NAME = "Indian Premier League"
+
+LIST_WIDGET_EVENTS_QUERY = "query listWidgetEvents($payload: ListWidgetEventsRequest!) { listWidgetEvents(payload: $payload) { events { id name leagueName startEventDate } } }"
+
+# Keep-alive session reused across event fetches instead of spawning curl
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=32))
+_http_session.headers.update({
+    'content-type': 'application/json',
+    'x-tenant': '10CRIC',
+    'x-apollo-operation-name': 'listWidgetEvents',
+    'apollo-require-preflight': 'true'
+})
+
 def get_credentials() -> Tuple[str, str]:
     """
     Get player ID and sportsbook token from environment or credentials file.
@@ -75,32 +93,24 @@ def fetch_upcoming_cricket_events(sport_id: Optional[str] = None) -> List[Dict[s
                 "widgetType": "WIDGET_TYPE_UPCOMING_EVENTS"
             }
         },
-        "query": "query listWidgetEvents($payload: ListWidgetEventsRequest!) { listWidgetEvents(payload: $payload) { events { id name leagueName startEventDate } } }"
+        "query": LIST_WIDGET_EVENTS_QUERY
     }
     
-    # Construct curl command
-    curl_command = f"""
-    curl 'https://www.10crics.com/graphql' \\
-      -H 'content-type: application/json' \\
-      -H 'x-player-id: {player_id}' \\
-      -H 'x-sportsbook-token: {sportsbook_token}' \\
-      -H 'x-tenant: 10CRIC' \\
-      -H 'x-apollo-operation-name: listWidgetEvents' \\
-      -H 'apollo-require-preflight: true' \\
-      --data-raw '{json.dumps(query)}'
-    """
-    
-    # Execute curl command
+    # Execute API request; the variables travel as a JSON body, never through a shell
     try:
         logger.info("Executing API request")
-        result = subprocess.run(curl_command, shell=True, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"Error executing curl command: {result.stderr}")
-            return []
+        response = _http_session.post(
+            GRAPHQL_URL,
+            json=query,
+            headers={
+                'x-player-id': player_id,
+                'x-sportsbook-token': sportsbook_token
+            },
+            timeout=10
+        )
         
         # Parse response
-        response_data = json.loads(result.stdout)
+        response_data = orjson.loads(response.content)
         events = response_data.get("data", {}).get("listWidgetEvents", {}).get("events", [])
         logger.info(f"Fetched {len(events)} cricket events")
         
@@ -129,9 +139,12 @@ def fetch_upcoming_cricket_events(sport_id: Optional[str] = None) -> List[Dict[s
         
         return formatted_events
         
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"Error parsing API response: {e}")
         return []
+    except requests.RequestException as e:
+        logger.error(f"Error executing API request: {e}")
+        return []
     except Exception as e:
         logger.error(f"Unexpected error fetching events: {e}")
         return []
@@ -149,9 +162,10 @@ def filter_ipl_matches(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     try:
         logger.info(f"Filtering {len(events)} events for IPL matches")
         
+        # Single pass; a null leagueName is treated as no league
         ipl_matches = [
             event for event in events
-            if "Indian Premier League" in event.get("leagueName", "")
+            if IPL_LEAGUE_NAME in (event.get("leagueName") or "")
         ]
         
         logger.info(f"Found {len(ipl_matches)} IPL matches")
@@ -25,9 +25,9 @@ def main():
     """Run the complete 10CRIC API workflow example."""
     # Step 1: Authenticate with 10CRIC
     logger.info("Step 1: Authenticating with 10CRIC")
-    from auth import authenticate
+    from auth import authenticate, run_sync
     
-    credentials = authenticate(headless=False)  # Set to True to run without browser UI
+    credentials = run_sync(authenticate(headless=False))  # Set to True to run without browser UI
     if not credentials:
         logger.error("Authentication failed. Check your credentials in .env file.")
         return
@@ -4,10 +4,10 @@ import os
 import json
 import logging
 import datetime
-import pytz
 import argparse
 import subprocess
 from typing import Dict, List, Any, Optional
+from ist_time import IST_TZ, get_current_ist_time, format_ist_time, set_mock_time
 
 # Configure logging
 logging.basicConfig(
@@ -30,31 +30,6 @@ SCHEDULE_FILE = os.path.join(CACHE_DIR, 'schedule.json')
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-# Global variable to store mock time for testing
-MOCK_TIME = None
-
-def get_current_ist_time():
-    """Get current time in IST timezone."""
-    ist_tz = pytz.timezone('Asia/Kolkata')
-    
-    # Use mock time if set (for testing)
-    if MOCK_TIME:
-        try:
-            # Parse the mock time and convert to IST
-            if isinstance(MOCK_TIME, str):
-                dt = datetime.datetime.fromisoformat(MOCK_TIME.replace('Z', '+00:00'))
-                return dt.astimezone(ist_tz)
-        except Exception as e:
-            logger.warning(f"Error parsing mock time: {e}, using real time")
-    
-    # Use real time
-    now_ist = datetime.datetime.now(ist_tz)
-    return now_ist
-
-def format_ist_time(dt):
-    """Format datetime object to IST time string."""
-    return dt.strftime('%Y-%m-%d %H:%M:%S %Z')
-
 def fetch_upcoming_matches():
     """Fetch upcoming IPL matches from the API and cache them."""
     logger.info("Fetching upcoming IPL matches")
@@ -89,6 +64,17 @@ def fetch_upcoming_matches():
         logger.error(f"Error fetching upcoming matches: {e}")
         return False
 
+def load_discovered_event_ids():
+    """Load the unique event IDs written by match discovery, in file order."""
+    try:
+        with open('ipl_event_ids.json', 'r') as f:
+            event_id_map = json.load(f)
+        # Both team orderings can map to the same event
+        return list(dict.fromkeys(event_id_map.values()))
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.warning(f"Could not load discovered event IDs: {e}")
+        return []
+
 def find_todays_match():
     """Find today's IPL match based on schedule."""
     try:
@@ -321,8 +307,13 @@ def cache_current_match(match):
         logger.error(f"Error caching match: {e}")
         return False
 
-def prefetch_markets(match):
-    """Prefetch markets for a match and cache them."""
+def prefetch_markets(match, discovered_event_ids=None):
+    """
+    Prefetch markets for a match and cache them.
+    
+    Other discovered events are prefetched in the same run, so their markets
+    are fetched in batched requests instead of one process per match.
+    """
     try:
         if not match:
             logger.warning("No match to prefetch markets for")
@@ -335,15 +326,21 @@ def prefetch_markets(match):
             logger.warning("No event ID for prefetching markets")
             return False
             
+        # The current match first, then any other discovered events
+        event_ids = list(dict.fromkeys([event_id] + (discovered_event_ids or [])))
+        
         # Run the check_ipl_markets.py script to prefetch markets
-        cmd = ["./check_ipl_markets.py", "--event-id", event_id, "--match-name", match_name, "--prefetch-only"]
+        if len(event_ids) > 1:
+            cmd = ["./check_ipl_markets.py", "--event-ids", ",".join(event_ids), "--prefetch-only"]
+        else:
+            cmd = ["./check_ipl_markets.py", "--event-id", event_id, "--match-name", match_name, "--prefetch-only"]
         result = subprocess.run(cmd, capture_output=True, text=True)
         
         if result.returncode != 0:
             logger.error(f"Error prefetching markets: {result.stderr}")
             return False
             
-        logger.info(f"Successfully prefetched markets for {match_name}")
+        logger.info(f"Successfully prefetched markets for {match_name} ({len(event_ids)} events)")
         return True
         
     except Exception as e:
@@ -385,7 +382,7 @@ def should_bet_now(match):
             
         # Parse the match time
         match_time = datetime.datetime.fromisoformat(match_time_str.replace('Z', '+00:00'))
-        match_time_ist = match_time.astimezone(pytz.timezone('Asia/Kolkata'))
+        match_time_ist = match_time.astimezone(IST_TZ)
         
         logger.info(f"Match time: {format_ist_time(match_time_ist)}")
         logger.info(f"Current time: {format_ist_time(now_ist)}")
@@ -418,6 +415,9 @@ def run_prefetch_mode():
     if not fetch_success:
         logger.warning("Failed to fetch upcoming matches")
     
+    # Read the discovered events before cache_current_match narrows the file to one match
+    discovered_event_ids = load_discovered_event_ids() if fetch_success else []
+    
     # Find today's match
     match = find_todays_match()
     
@@ -427,7 +427,7 @@ def run_prefetch_mode():
         
         if cache_success:
             # Prefetch markets
-            prefetch_success = prefetch_markets(match)
+            prefetch_success = prefetch_markets(match, discovered_event_ids)
             
             if prefetch_success:
                 logger.info("Successfully completed prefetch")
@@ -487,10 +487,8 @@ def main():
     args = parser.parse_args()
     
     # Set mock time if provided
-    global MOCK_TIME
     if args.mock_time:
-        MOCK_TIME = args.mock_time
-        logger.info(f"Using mock time: {MOCK_TIME}")
+        set_mock_time(args.mock_time)
     
     if args.prefetch:
         run_prefetch_mode()
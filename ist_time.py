@@ -0,0 +1,44 @@
+import datetime
+import logging
+import pytz
+
+logger = logging.getLogger('ist_time')
+
+# Resolved once; every IST conversion shares this tzinfo
+IST_TZ = pytz.timezone('Asia/Kolkata')
+
+# Parsed mock time (IST) for testing, set by the entry points' --mock-time
+MOCK_TIME = None
+
+def set_mock_time(mock_time: str) -> bool:
+    """
+    Parse a --mock-time value once and use it as the current IST time.
+
+    Args:
+        mock_time: ISO timestamp (format: YYYY-MM-DDTHH:MM:SS, optional Z suffix)
+
+    Returns:
+        True if the mock time was set, False if it could not be parsed
+    """
+    global MOCK_TIME
+    try:
+        MOCK_TIME = datetime.datetime.fromisoformat(mock_time.replace('Z', '+00:00')).astimezone(IST_TZ)
+    except ValueError as e:
+        logger.warning(f"Error parsing mock time: {e}, using real time")
+        return False
+
+    logger.info(f"Using mock time: {mock_time}")
+    return True
+
+def get_current_ist_time():
+    """Get current time in IST timezone."""
+    # Use mock time if set (for testing)
+    if MOCK_TIME:
+        return MOCK_TIME
+
+    # Use real time
+    return datetime.datetime.now(IST_TZ)
+
+def format_ist_time(dt):
+    """Format datetime object to IST time string."""
+    return dt.strftime('%Y-%m-%d %H:%M:%S %Z')
@@ -6,10 +6,11 @@ import pytz
 from typing import Dict, Any, List, Optional
 
 from cricket import get_upcoming_ipl_matches
-from markets import get_markets_for_event, extract_active_markets
+from markets import get_markets_for_event, get_markets_for_events, extract_active_markets
 from sanction import BettingSanctionManager
 from betting import place_bet
 from bet_tracker import BetTracker
+from ist_time import IST_TZ
 
 # Configure logging
 logging.basicConfig(
@@ -45,9 +46,7 @@ class SimpleMarketMonitor:
                 logger.info("No upcoming IPL matches found")
                 return None
             
-            # Get IST timezone for comparison
-            ist_tz = pytz.timezone('Asia/Kolkata')
-            now_ist = datetime.datetime.now(ist_tz)
+            now_ist = datetime.datetime.now(IST_TZ)
             logger.info(f"Current time in IST: {now_ist.strftime('%Y-%m-%d %H:%M:%S %Z')}")
             
             # Display all matches with start times
@@ -71,7 +70,7 @@ class SimpleMarketMonitor:
                     # Convert timestamp to datetime object with IST timezone
                     timestamp_seconds = int(start_time_str) / 1000
                     start_time_utc = datetime.datetime.fromtimestamp(timestamp_seconds, tz=pytz.UTC)
-                    start_time_ist = start_time_utc.astimezone(ist_tz)
+                    start_time_ist = start_time_utc.astimezone(IST_TZ)
                     
                     logger.info(f"Match: {match.get('name')} Start time (IST): {start_time_ist.strftime('%Y-%m-%d %H:%M:%S %Z')}")
                     
@@ -116,7 +115,7 @@ class SimpleMarketMonitor:
                     start_time_str = match.get("startEventDate", "Unknown")
                     timestamp_seconds = int(start_time_str) / 1000
                     start_time_utc = datetime.datetime.fromtimestamp(timestamp_seconds, tz=pytz.UTC)
-                    start_time_ist = start_time_utc.astimezone(ist_tz)
+                    start_time_ist = start_time_utc.astimezone(IST_TZ)
                     time_str = start_time_ist.strftime('%Y-%m-%d %H:%M:%S %Z')
                     logger.info(f"{idx}. {name} - {time_str}")
                 
@@ -138,13 +137,14 @@ class SimpleMarketMonitor:
             logger.error(f"Error finding current match: {e}")
             return None
     
-    def check_markets(self, event_id, match_name=None, prefetch_only=False):
-        """Check available markets for a given event."""
+    def check_markets(self, event_id, match_name=None, prefetch_only=False, result=None):
+        """Check available markets for a given event, fetching them unless a result is given."""
         try:
             logger.info(f"Checking markets for event: {event_id}")
             
             # Get current markets
-            result = get_markets_for_event(event_id)
+            if result is None:
+                result = get_markets_for_event(event_id)
             
             if "error" in result:
                 logger.error(f"Error fetching markets: {result['error']}")
@@ -349,6 +349,25 @@ class SimpleMarketMonitor:
             logger.error(f"Error checking markets: {e}")
             return None
     
+    def prefetch_markets(self, event_ids):
+        """
+        Prefetch markets for several events.
+        
+        The events are fetched in batched GraphQL requests, one round trip per
+        batch instead of one per event, then saved like check_markets does.
+        
+        Args:
+            event_ids: Event IDs to prefetch markets for
+            
+        Returns:
+            Dictionary mapping each event ID to its active markets (None on failure)
+        """
+        fetched = get_markets_for_events(event_ids)
+        return {
+            event_id: self.check_markets(event_id, prefetch_only=True, result=fetched[event_id])
+            for event_id in event_ids
+        }
+    
     def run(self, event_id=None, match_name=None):
         """
         Run the market monitor once.
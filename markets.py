@@ -1,7 +1,10 @@
 import json
-import subprocess
 import os
 import logging
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional, Tuple
 
 # Configure logging
@@ -11,6 +14,66 @@ logging.basicConfig(
 )
 logger = logging.getLogger('10cric_markets')
 
+GRAPHQL_URL = "https://www.10crics.com/graphql"
+
+# Keep-alive session reused across market fetches instead of spawning curl
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=32))
+_http_session.headers.update({
+    'content-type': 'application/json',
+    'x-tenant': '10CRIC',
+    'x-apollo-operation-name': 'lazyEvent',
+    'apollo-require-preflight': 'true'
+})
+
+# Selection set of one lazyEvent field, shared by the single and batched queries
+LAZY_EVENT_FIELDS = """{
+    sportEvent {
+      id
+      name
+      leagueId
+      leagueName
+      regionName
+      sportId
+      sportName
+      isLive
+      startEventDate
+      participantHomeName
+      participantAwayName
+      expandedMarkets {
+        id
+        name
+        marketLines {
+          id
+          name
+          isSuspended
+          marketLineStatus
+          selections {
+            id
+            name
+            odds
+            isActive
+            __typename
+          }
+          __typename
+        }
+        __typename
+      }
+      __typename
+    }
+    __typename
+  }"""
+
+LAZY_EVENT_QUERY = f"""query lazyEvent($payload: LazyEventRequest!) {{
+  lazyEvent(payload: $payload) {LAZY_EVENT_FIELDS}
+}}"""
+
+# Events aliased into one batched request
+MAX_EVENTS_PER_REQUEST = 25
+
+# Market requests in flight at once (batches, or per-event fallbacks)
+MAX_CONCURRENT_REQUESTS = 8
+
 def get_credentials() -> Tuple[str, str]:
     """
     Get player ID and sportsbook token from environment or credentials file.
@@ -60,95 +123,188 @@ def get_markets_for_event(event_id: str) -> Dict[str, Any]:
                 "eventId": event_id
             }
         },
-        "query": """query lazyEvent($payload: LazyEventRequest!) {
-          lazyEvent(payload: $payload) {
-            sportEvent {
-              id
-              name
-              leagueId
-              leagueName
-              regionName
-              sportId
-              sportName
-              isLive
-              startEventDate
-              participantHomeName
-              participantAwayName
-              expandedMarkets {
-                id
-                name
-                marketLines {
-                  id
-                  name
-                  isSuspended
-                  marketLineStatus
-                  selections {
-                    id
-                    name
-                    odds
-                    isActive
-                    __typename
-                  }
-                  __typename
-                }
-                __typename
-              }
-              __typename
-            }
-            __typename
-          }
-        }"""
+        "query": LAZY_EVENT_QUERY
     }
     
-    # Construct the curl command
-    curl_command = f"""
-    curl 'https://www.10crics.com/graphql' \\
-      -H 'content-type: application/json' \\
-      -H 'x-player-id: {player_id}' \\
-      -H 'x-sportsbook-token: {sportsbook_token}' \\
-      -H 'x-tenant: 10CRIC' \\
-      -H 'x-apollo-operation-name: lazyEvent' \\
-      -H 'apollo-require-preflight: true' \\
-      --data-raw '{json.dumps(query)}'
-    """
-    
-    # Execute the curl command
+    # Execute the API request; the variables travel as a JSON body, never through a shell
     try:
-        result = subprocess.run(curl_command, shell=True, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"Error executing curl command: {result.stderr}")
-            return {"error": "Failed to execute API call"}
-            
-        response_data = json.loads(result.stdout)
+        response = _http_session.post(
+            GRAPHQL_URL,
+            json=query,
+            headers={
+                'x-player-id': player_id,
+                'x-sportsbook-token': sportsbook_token
+            },
+            timeout=10
+        )
+        response_data = orjson.loads(response.content)
         
         # Check for errors in response
         if "errors" in response_data:
             logger.error(f"API returned errors: {response_data['errors']}")
             return {"error": "API returned errors", "details": response_data["errors"]}
         
-        # Extract event data with markets
-        event_data = response_data.get("data", {}).get("lazyEvent", {}).get("sportEvent")
-        if not event_data:
-            logger.error("No event data found in response")
-            return {"error": "No event data found"}
+        return event_markets_result(event_id, (response_data.get("data") or {}).get("lazyEvent"))
         
-        logger.info(f"Successfully fetched markets for event: {event_data.get('name')}")
-        
-        # Save raw response for debugging
-        os.makedirs("markets", exist_ok=True)
-        with open(f"markets/raw_markets_{event_id}.json", "w") as f:
-            json.dump(response_data, f, indent=2)
-        
-        return {"success": True, "event_data": event_data}
-        
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"Error parsing response: {e}")
         return {"error": "Failed to parse API response"}
+    except requests.RequestException as e:
+        logger.error(f"Error executing API call: {e}")
+        return {"error": "Failed to execute API call"}
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return {"error": "Unexpected error", "details": str(e)}
 
+def event_markets_result(event_id: str, lazy_event: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Turn one lazyEvent result into the get_markets_for_event return shape.
+    
+    The raw result is saved under markets/ in the single-event response layout.
+    
+    Args:
+        event_id: ID of the event
+        lazy_event: The lazyEvent field of the GraphQL response
+        
+    Returns:
+        Dictionary containing the event and market data, or an error
+    """
+    # Extract event data with markets
+    event_data = (lazy_event or {}).get("sportEvent")
+    if not event_data:
+        logger.error(f"No event data found in response for event {event_id}")
+        return {"error": "No event data found"}
+    
+    logger.info(f"Successfully fetched markets for event: {event_data.get('name')}")
+    
+    # Save raw response for debugging
+    os.makedirs("markets", exist_ok=True)
+    with open(f"markets/raw_markets_{event_id}.json", "w") as f:
+        json.dump({"data": {"lazyEvent": lazy_event}}, f, indent=2)
+    
+    return {"success": True, "event_data": event_data}
+
+def build_lazy_events_query(count: int) -> str:
+    """
+    Build one query fetching `count` events through aliases e0..e{count-1}.
+    
+    Args:
+        count: Number of events in the batch
+        
+    Returns:
+        GraphQL query string taking variables p0..p{count-1}
+    """
+    params = ", ".join(f"$p{i}: LazyEventRequest!" for i in range(count))
+    fields = "\n".join(f"  e{i}: lazyEvent(payload: $p{i}) {LAZY_EVENT_FIELDS}" for i in range(count))
+    return f"query lazyEvent({params}) {{\n{fields}\n}}"
+
+def fetch_markets_batch(batch: List[str], player_id: str, sportsbook_token: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Fetch markets for one batch of events in a single aliased request.
+    
+    Args:
+        batch: IDs of the events, at most MAX_EVENTS_PER_REQUEST
+        player_id: Player ID header value
+        sportsbook_token: Sportsbook token header value
+        
+    Returns:
+        Dictionary mapping each event ID to its get_markets_for_event-style result,
+        or None if the request failed or was rejected as a whole
+    """
+    logger.info(f"Fetching markets for {len(batch)} events in one request")
+    
+    query = {
+        "operationName": "lazyEvent",
+        "variables": {f"p{i}": {"eventId": event_id} for i, event_id in enumerate(batch)},
+        "query": build_lazy_events_query(len(batch))
+    }
+    
+    try:
+        response = _http_session.post(
+            GRAPHQL_URL,
+            json=query,
+            headers={
+                'x-player-id': player_id,
+                'x-sportsbook-token': sportsbook_token
+            },
+            timeout=10
+        )
+        response_data = orjson.loads(response.content)
+        batch_error = None
+        if response.status_code != 200:
+            batch_error = f"HTTP {response.status_code}"
+        elif not response_data.get("data") and response_data.get("errors"):
+            # Rejected as a whole (e.g. a complexity limit or aliasing not allowed)
+            batch_error = response_data["errors"]
+    except (requests.RequestException, ValueError) as e:
+        batch_error = e
+    
+    if batch_error is not None:
+        logger.warning(f"Batched market request failed ({batch_error}), fetching events individually")
+        return None
+    
+    # Errors carry the alias they belong to as the first path element
+    errors_by_alias = {}
+    for error in response_data.get("errors") or []:
+        path = error.get("path") or [None]
+        errors_by_alias.setdefault(path[0], []).append(error)
+    
+    results = {}
+    data = response_data.get("data") or {}
+    for i, event_id in enumerate(batch):
+        alias = f"e{i}"
+        if data.get(alias) is None:
+            details = errors_by_alias.get(alias) or response_data.get("errors")
+            if details:
+                logger.error(f"API returned errors for event {event_id}: {details}")
+                results[event_id] = {"error": "API returned errors", "details": details}
+                continue
+        results[event_id] = event_markets_result(event_id, data.get(alias))
+    
+    return results
+
+def get_markets_for_events(event_ids: List[str], max_batch: int = MAX_EVENTS_PER_REQUEST) -> Dict[str, Dict[str, Any]]:
+    """
+    Get markets for several events, batching up to `max_batch` events per request.
+    
+    Events are aliased into a single GraphQL operation, so each batch costs one
+    round trip, and the batches run concurrently. If a batch request fails or is
+    rejected as a whole (non-200 status, or top-level errors without data), its
+    events are fetched with get_markets_for_event, also concurrently.
+    
+    Args:
+        event_ids: IDs of the events
+        max_batch: Maximum number of events per request
+        
+    Returns:
+        Dictionary mapping each event ID to its get_markets_for_event-style result
+    """
+    if not event_ids:
+        return {}
+    
+    player_id, sportsbook_token = get_credentials()
+    
+    if not player_id or not sportsbook_token:
+        logger.error("Missing credentials for fetching markets")
+        return {event_id: {"error": "Missing credentials"} for event_id in event_ids}
+    
+    batches = [event_ids[start:start + max_batch] for start in range(0, len(event_ids), max_batch)]
+    results = {}
+    rejected = []
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, max(len(batches), len(event_ids)))) as executor:
+        batch_results = executor.map(lambda batch: fetch_markets_batch(batch, player_id, sportsbook_token), batches)
+        for batch, batch_result in zip(batches, batch_results):
+            if batch_result is None:
+                rejected.extend(batch)
+            else:
+                results.update(batch_result)
+        
+        # Events of rejected batches cost a request each, so overlap those requests
+        for event_id, result in zip(rejected, executor.map(get_markets_for_event, rejected)):
+            results[event_id] = result
+    
+    return results
+
 def extract_active_markets(event_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Extract active (non-suspended) markets with their selections.
@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 import logging
 import argparse
+import json
+import os
+import shutil
+import tempfile
+import unittest
 from bet_tracker import BetTracker
 
 # Configure logging
@@ -81,6 +86,149 @@ def add_mock_bets(tracker, count=3):
     
     return count
 
+def api_bet(bet_id, status, stake, payout, market):
+    """Build a bet as returned by the GetBetPage query."""
+    return {
+        "internalBetUuid": bet_id,
+        "ticketId": bet_id,
+        "purchaseTime": "1743500000000",
+        "betTypeName": "Single",
+        "odds": 2.0,
+        "stake": {"value": str(stake)},
+        "payout": {"value": str(payout)},
+        "status": status,
+        "updateTime": "1743500000000",
+        "events": [{
+            "name": "Delhi Capitals vs. Lucknow Super Giants",
+            "homeTeam": "Delhi Capitals",
+            "awayTeam": "Lucknow Super Giants",
+            "userBet": "Over 7.5",
+            "eventType": market,
+            "odds": 2.0,
+            "status": status
+        }]
+    }
+
+class TestBetTracker(unittest.TestCase):
+    """
+    Test in-place appends to the history file and incremental performance aggregates.
+    """
+    
+    def setUp(self):
+        """Set up a scratch directory for history files."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.history_file = os.path.join(self.temp_dir, "successful_bets.json")
+        logging.disable(logging.CRITICAL)
+    
+    def tearDown(self):
+        """Remove the scratch directory."""
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(self.temp_dir)
+    
+    def _write(self, content):
+        with open(self.history_file, "w") as f:
+            f.write(content)
+    
+    def _load(self):
+        with open(self.history_file) as f:
+            return json.load(f)
+    
+    def test_append_to_empty_array(self):
+        """Test that the first bet appended to an empty [] file yields a one-element list."""
+        self._write("[]")
+        tracker = BetTracker(self.history_file)
+        add_mock_bets(tracker, 1)
+        self.assertEqual(self._load(), tracker.bet_history)
+    
+    def test_append_matches_full_save(self):
+        """Test that appending to a non-empty array writes the same bytes as a full save."""
+        tracker = BetTracker(self.history_file)
+        add_mock_bets(tracker, 3)
+        with open(self.history_file, "rb") as f:
+            appended = f.read()
+        
+        tracker._save_bet_history()
+        with open(self.history_file, "rb") as f:
+            saved = f.read()
+        self.assertEqual(appended, saved)
+        self.assertEqual(len(self._load()), 3)
+    
+    def test_append_to_missing_file(self):
+        """Test that recording a bet creates the history file when it doesn't exist."""
+        tracker = BetTracker(self.history_file)
+        self.assertEqual(tracker.bet_history, [])
+        add_mock_bets(tracker, 1)
+        self.assertEqual(self._load(), tracker.bet_history)
+    
+    def test_append_with_trailing_whitespace(self):
+        """Test that whitespace after the closing bracket is still appended to in place."""
+        self._write("[]\n\n  ")
+        tracker = BetTracker(self.history_file)
+        add_mock_bets(tracker, 2)
+        self.assertEqual(self._load(), tracker.bet_history)
+    
+    def test_append_to_corrupt_tail(self):
+        """Test that a file not ending in a JSON array is rewritten as valid JSON."""
+        self._write('[{"bet_id": "x"')
+        tracker = BetTracker(self.history_file)
+        add_mock_bets(tracker, 1)
+        self.assertEqual(self._load(), tracker.bet_history)
+    
+    def _history_tracker(self):
+        """Import bet_history_tracker with its history and performance files in the scratch directory."""
+        import bet_history_tracker
+        
+        for name, filename in (("HISTORY_FILE", "bet_history_log.json"), ("PERFORMANCE_FILE", "bet_performance.json")):
+            self.addCleanup(setattr, bet_history_tracker, name, getattr(bet_history_tracker, name))
+            setattr(bet_history_tracker, name, os.path.join(self.temp_dir, filename))
+        return bet_history_tracker
+    
+    def test_incremental_performance_matches_rebuild(self):
+        """Test that aggregates updated bet by bet equal a rebuild from the full history."""
+        bet_history_tracker = self._history_tracker()
+        performance = bet_history_tracker.calculate_performance({})
+        bet_history_tracker.update_bet_history_log([
+            api_bet("a", "BET_STATUS_PENDING", 100, 0, "Over 1"),
+            api_bet("b", "BET_STATUS_PENDING", 200, 0, "Over 2"),
+            api_bet("c", "BET_STATUS_LOST", 50, 0, "Over 1"),
+        ], performance)
+        # Settle two of the pending bets and add a new one
+        history = bet_history_tracker.update_bet_history_log([
+            api_bet("a", "BET_STATUS_WON", 100, 215, "Over 1"),
+            api_bet("b", "BET_STATUS_LOST", 200, 0, "Over 2"),
+            api_bet("d", "BET_STATUS_PENDING", 300, 0, "Over 6"),
+        ], performance)
+        
+        # Still in step with the history, so calculate_performance keeps the incremental totals
+        self.assertEqual(performance["history_hash"], bet_history_tracker.history_digest(history))
+        incremental = bet_history_tracker.calculate_performance(history, performance)
+        rebuilt = bet_history_tracker.calculate_performance(history, None)
+        incremental.pop("last_updated")
+        rebuilt.pop("last_updated")
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(rebuilt["total_bets"], 4)
+        self.assertEqual(rebuilt["profit_loss"], -135)
+    
+    def test_performance_recovers_from_crash_between_saves(self):
+        """Test that aggregates saved before a status change are rebuilt, not left stale."""
+        bet_history_tracker = self._history_tracker()
+        
+        history = bet_history_tracker.update_bet_history_log(
+            [api_bet("a", "BET_STATUS_PENDING", 100, 0, "Over 1")], bet_history_tracker.load_performance())
+        bet_history_tracker.calculate_performance(history)
+        
+        # The history is saved with the bet settled, then the process dies before calculate_performance
+        bet_history_tracker.update_bet_history_log(
+            [api_bet("a", "BET_STATUS_WON", 100, 200, "Over 1")], bet_history_tracker.load_performance())
+        
+        performance = bet_history_tracker.load_performance()
+        history = bet_history_tracker.update_bet_history_log(
+            [api_bet("a", "BET_STATUS_WON", 100, 200, "Over 1")], performance)
+        performance = bet_history_tracker.calculate_performance(history, performance)
+        self.assertEqual(performance["total_won"], 1)
+        self.assertEqual(performance["pending"], 0)
+        self.assertEqual(performance["profit_loss"], 100)
+
 def main():
     """Test the bet tracker functionality."""
     parser = argparse.ArgumentParser(description="Bet Tracker Test Utility")